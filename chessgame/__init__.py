@@ -0,0 +1,35 @@
+# ChessGame engine, tools and Qt board. Names are imported from their submodule on
+# first access, so `import chessgame` costs almost nothing and code that only
+# needs the engine never loads PyQt5, SQLite or the tablebase reader.
+import importlib
+
+_EXPORTS = {
+    'ChessEngine': 'engine',
+    'SearchResult': 'engine',
+    'SearchStats': 'engine',
+    'TranspositionTable': 'engine',
+    'MoveOrderer': 'engine',
+    'Position': 'position',
+    'OpeningBook': 'book',
+    'Tablebase': 'tablebase',
+    'AnalysisCache': 'analysis_cache',
+    'read_epd': 'epd',
+    'ChessBoard': 'ui',
+    'EngineChessBoard': 'ui',
+    'BoardRenderer': 'board_view',
+    'BoardView': 'board_view',
+    'EngineBoardView': 'board_view',
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
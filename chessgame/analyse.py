@@ -0,0 +1,151 @@
+# Batch analysis of EPD or PGN files with a pool of engine processes. Results are
+# written as JSON lines, either in input order or as they complete, e.g.
+#   python -m chessgame.analyse games.pgn --depth 5 --workers 4 --output analysis.jsonl
+# Rerunning the same command after an interruption skips the positions already in
+# the output file and appends the rest.
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import chess
+import chess.pgn
+from .engine import ChessEngine
+from .epd import read_epd
+
+worker_engine = None
+
+def init_worker(depth, tt_size, tablebase_path, cache_path):
+    global worker_engine
+    worker_engine = ChessEngine(max(depth - 1, 0), tt_size, tablebase_path=tablebase_path,
+                                cache_path=cache_path)
+
+def analyse_position(index, position_id, fen, movetime_ms, nodes):
+    # Runs in a pool process; the engine and its transposition table are kept
+    # between positions, which pays off for consecutive positions of a game.
+    board = chess.Board(fen)
+    start = time.perf_counter()
+    result = worker_engine.search(board, movetime_ms, nodes)
+    elapsed = time.perf_counter() - start
+    return {
+        'index': index,
+        'id': position_id,
+        'fen': fen,
+        'move': result.move.uci() if result.move else None,
+        'score': result.score,
+        'depth': result.depth,
+        'pv': [move.uci() for move in result.pv],
+        'nodes': result.nodes,
+        'time': round(elapsed, 4),
+    }
+
+def read_pgn(path, min_ply=0):
+    # Every position of every game from min_ply on, one game in memory at a time.
+    with open(path) as pgn_file:
+        number = 0
+        while True:
+            game = chess.pgn.read_game(pgn_file)
+            if game is None:
+                return
+            number += 1
+            board = game.board()
+            for ply, move in enumerate(game.mainline_moves()):
+                if ply >= min_ply:
+                    yield f'game{number}.ply{ply}', board.fen()
+                board.push(move)
+
+def read_positions(path, min_ply=0):
+    if path.lower().endswith('.pgn'):
+        return read_pgn(path, min_ply)
+    return ((operations.get('id', f'line{number}'), board.fen())
+            for number, board, operations in read_epd(path))
+
+def analyse(positions, depth=4, movetime_ms=None, nodes=None, workers=None, ordered=True,
+            max_pending=None, skip=(), tt_size=1 << 16, tablebase_path=None, cache_path=None):
+    # Yields one result dict per (id, fen) in positions. At most max_pending
+    # positions are in flight or waiting to be emitted in order, so the input is
+    # only read as fast as the pool gets through it. Indices in skip are not
+    # analysed again.
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 4
+    tasks = ((index, position_id, fen) for index, (position_id, fen) in enumerate(positions)
+             if index not in skip)
+    pending = set()
+    finished = {}
+    next_index = 0
+    with ProcessPoolExecutor(workers, initializer=init_worker,
+                             initargs=(depth, tt_size, tablebase_path, cache_path)) as executor:
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) + len(finished) < max_pending:
+                task = next(tasks, None)
+                if task is None:
+                    exhausted = True
+                    break
+                pending.add(executor.submit(analyse_position, *task, movetime_ms, nodes))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if not ordered:
+                    yield result
+                    continue
+                finished[result['index']] = result
+            # In order, results wait until everything before them (that is not
+            # being skipped) has been emitted.
+            while finished:
+                while next_index in skip:
+                    next_index += 1
+                if next_index not in finished:
+                    break
+                yield finished.pop(next_index)
+                next_index += 1
+
+def read_checkpoint(path):
+    # Indices already in the output file. A line cut short by an interruption is
+    # dropped so the file can be appended to cleanly.
+    done = set()
+    if not os.path.exists(path):
+        return done
+    valid_length = 0
+    with open(path, 'rb') as output_file:
+        for line in output_file:
+            try:
+                done.add(json.loads(line)['index'])
+            except (ValueError, KeyError):
+                break
+            valid_length += len(line)
+    with open(path, 'r+b') as output_file:
+        output_file.truncate(valid_length)
+    return done
+
+def main():
+    parser = argparse.ArgumentParser(description='Analyse every position of an EPD or PGN file.')
+    parser.add_argument('input', help='EPD or PGN file')
+    parser.add_argument('--output', help='JSONL file to write; also the checkpoint for resuming')
+    parser.add_argument('--depth', type=int, default=4, help='search depth in plies')
+    parser.add_argument('--movetime', type=int, help='time per position in milliseconds instead of a depth')
+    parser.add_argument('--nodes', type=int, help='node budget per position instead of a depth')
+    parser.add_argument('--workers', type=int, default=None, help='engine processes (default: CPU count)')
+    parser.add_argument('--unordered', action='store_true', help='write results as they complete')
+    parser.add_argument('--min-ply', type=int, default=0, help='skip the first plies of every PGN game')
+    parser.add_argument('--syzygy', help='directory with Syzygy tablebases')
+    parser.add_argument('--cache', help='SQLite analysis cache shared by the workers and later runs')
+    args = parser.parse_args()
+
+    skip = read_checkpoint(args.output) if args.output else set()
+    output_file = open(args.output, 'a') if args.output else sys.stdout
+    try:
+        for result in analyse(read_positions(args.input, args.min_ply), args.depth, args.movetime, args.nodes,
+                              args.workers, not args.unordered, skip=skip, tablebase_path=args.syzygy,
+                              cache_path=args.cache):
+            output_file.write(json.dumps(result) + '\n')
+            output_file.flush()
+    finally:
+        if output_file is not sys.stdout:
+            output_file.close()
+
+if __name__ == '__main__':
+    main()
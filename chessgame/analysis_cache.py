@@ -0,0 +1,96 @@
+# Persistent analysis cache for ChessEngine: search results keyed by Zobrist key,
+# kept in SQLite so they survive between runs and can be shared by several engine
+# processes at once (WAL mode, one connection per process).
+import os
+import sqlite3
+import time
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS entries (
+    key INTEGER PRIMARY KEY,
+    depth INTEGER NOT NULL,
+    flag INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    move INTEGER,
+    used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_used ON entries (used);
+'''
+
+def to_signed(key):
+    # SQLite integers are signed 64-bit; Zobrist keys are unsigned.
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+class AnalysisCache:
+    # Entries are only replaced by results at least as deep. Every
+    # EVICT_CHECK_INTERVAL writes the size is checked, and a table past
+    # max_entries loses its least recently written entries.
+    EVICT_CHECK_INTERVAL = 1024
+
+    def __init__(self, path, max_entries=1 << 20, timeout=30.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.connection = None
+        self.pid = None
+        self.writes = 0
+        self.probes = 0
+        self.hits = 0
+
+    def connect(self):
+        # A connection must not cross a fork, so each process opens its own.
+        if self.connection is None or self.pid != os.getpid():
+            self.connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('PRAGMA synchronous=NORMAL')
+            self.connection.executescript(SCHEMA)
+            self.pid = os.getpid()
+        return self.connection
+
+    def close(self):
+        if self.connection is not None and self.pid == os.getpid():
+            self.connection.close()
+        self.connection = None
+
+    def probe(self, key):
+        # Returns (depth, flag, score, move) or None.
+        self.probes += 1
+        row = self.connect().execute('SELECT depth, flag, score, move FROM entries WHERE key = ?',
+                                     (to_signed(key),)).fetchone()
+        if row is not None:
+            self.hits += 1
+        return row
+
+    def store_many(self, entries):
+        # entries are (key, depth, flag, score, move) tuples, written in one transaction.
+        connection = self.connect()
+        now = time.time()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.executemany(
+                'INSERT INTO entries (key, depth, flag, score, move, used) VALUES (?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET depth = excluded.depth, flag = excluded.flag, '
+                'score = excluded.score, move = excluded.move, used = excluded.used '
+                'WHERE excluded.depth >= entries.depth',
+                [(to_signed(key), depth, flag, score, move, now) for key, depth, flag, score, move in entries])
+            self.writes += len(entries)
+            if self.writes >= self.EVICT_CHECK_INTERVAL:
+                self.writes = 0
+                self.evict(connection)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    def store(self, key, depth, flag, score, move):
+        self.store_many([(key, depth, flag, score, move)])
+
+    def evict(self, connection):
+        count = connection.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        if count > self.max_entries:
+            excess = count - self.max_entries + self.max_entries // 10
+            connection.execute('DELETE FROM entries WHERE key IN '
+                               '(SELECT key FROM entries ORDER BY used LIMIT ?)', (excess,))
+
+    def __len__(self):
+        return self.connect().execute('SELECT COUNT(*) FROM entries').fetchone()[0]
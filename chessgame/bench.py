@@ -0,0 +1,150 @@
+# Perft and search benchmark for ChessEngine. Prints a JSON report so numbers can
+# be compared between versions, e.g.
+#   python -m chessgame.bench --depth 4 --output bench.json
+import argparse
+import itertools
+import json
+import os
+import time
+import chess
+from .engine import ChessEngine
+from .epd import read_epd
+from .position import Position
+
+# (name, fen, known perft node counts for depth 1, 2, ...)
+PERFT_POSITIONS = [
+    ('startpos', chess.STARTING_FEN, [20, 400, 8902, 197281]),
+    ('kiwipete', 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1', [48, 2039, 97862]),
+    ('position3', '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1', [14, 191, 2812, 43238]),
+    ('position4', 'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1', [6, 264, 9467]),
+    ('position5', 'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8', [44, 1486, 62379]),
+]
+
+DEFAULT_EPD = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench.epd')
+
+def perft(board, depth):
+    if depth == 0:
+        return 1
+    if depth == 1:
+        return board.legal_moves.count()
+    nodes = 0
+    for move in board.legal_moves:
+        board.push(move)
+        nodes += perft(board, depth - 1)
+        board.pop()
+    return nodes
+
+def run_perft(max_depth):
+    # Perft through the engine's own Position, checked for parity against both the
+    # known counts and python-chess.
+    results = []
+    for name, fen, expected in PERFT_POSITIONS:
+        depth = min(max_depth, len(expected))
+        board = chess.Board(fen)
+        position = Position(board, ChessEngine.SQUARE_VALUES)
+        start = time.perf_counter()
+        nodes = position.perft(depth)
+        elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        reference_nodes = perft(board, depth)
+        reference_elapsed = time.perf_counter() - start
+        results.append({
+            'name': name,
+            'depth': depth,
+            'nodes': nodes,
+            'expected': expected[depth - 1],
+            'python_chess_nodes': reference_nodes,
+            'ok': nodes == reference_nodes == expected[depth - 1],
+            'time': round(elapsed, 4),
+            'nps': int(nodes / elapsed) if elapsed > 0 else 0,
+            'python_chess_nps': int(reference_nodes / reference_elapsed) if reference_elapsed > 0 else 0,
+        })
+    return results
+
+def run_search(path, depth, limit=None):
+    results = []
+    for index, (_, board, operations) in enumerate(itertools.islice(read_epd(path), limit)):
+        engine = ChessEngine(max_depth=depth - 1)
+        iterations = []
+        start = time.perf_counter()
+        result = engine.search(board, info=iterations.append)
+        elapsed = time.perf_counter() - start
+        table = engine.transposition_table
+
+        iteration_nodes = []
+        previous = 0
+        for data in iterations:
+            iteration_nodes.append(data['nodes'] - previous)
+            previous = data['nodes']
+        branching = None
+        if len(iteration_nodes) >= 2 and iteration_nodes[-2]:
+            branching = round(iteration_nodes[-1] / iteration_nodes[-2], 2)
+
+        entry = {
+            'id': operations.get('id', str(index + 1)),
+            'fen': board.fen(),
+            'move': result.move.uci() if result.move else None,
+            'score': result.score,
+            'depth': result.depth,
+            'pv': [move.uci() for move in result.pv],
+            'nodes': result.nodes,
+            'time': round(elapsed, 4),
+            'nps': int(result.nodes / elapsed) if elapsed > 0 else 0,
+            'time_to_depth': {data['depth']: round(data['time'], 4) for data in iterations},
+            'tt_hit_rate': round(table.hits / table.probes, 4) if table.probes else 0.0,
+            'branching_factor': branching,
+        }
+        if 'bm' in operations:
+            entry['best_move_found'] = result.move in operations['bm']
+        results.append(entry)
+    return results
+
+def summarize(perft_results, search_results):
+    summary = {}
+    if perft_results:
+        nodes = sum(result['nodes'] for result in perft_results)
+        elapsed = sum(result['time'] for result in perft_results)
+        summary['perft_ok'] = all(result['ok'] for result in perft_results)
+        summary['perft_nps'] = int(nodes / elapsed) if elapsed > 0 else 0
+    if search_results:
+        nodes = sum(result['nodes'] for result in search_results)
+        elapsed = sum(result['time'] for result in search_results)
+        factors = [result['branching_factor'] for result in search_results if result['branching_factor']]
+        summary['search_nodes'] = nodes
+        summary['search_time'] = round(elapsed, 4)
+        summary['search_nps'] = int(nodes / elapsed) if elapsed > 0 else 0
+        summary['mean_branching_factor'] = round(sum(factors) / len(factors), 2) if factors else None
+        summary['mean_tt_hit_rate'] = round(
+            sum(result['tt_hit_rate'] for result in search_results) / len(search_results), 4)
+        solved = [result['best_move_found'] for result in search_results if 'best_move_found' in result]
+        if solved:
+            summary['best_moves_found'] = f'{sum(solved)}/{len(solved)}'
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark move generation and ChessEngine search.')
+    parser.add_argument('--perft-depth', type=int, default=3, help='maximum perft depth per position')
+    parser.add_argument('--depth', type=int, default=4, help='search depth in plies')
+    parser.add_argument('--epd', default=DEFAULT_EPD, help='EPD file with the search positions')
+    parser.add_argument('--positions', type=int, default=None, help='only search the first N positions')
+    parser.add_argument('--no-perft', action='store_true', help='skip the perft part')
+    parser.add_argument('--no-search', action='store_true', help='skip the search part')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    args = parser.parse_args()
+
+    perft_results = [] if args.no_perft else run_perft(args.perft_depth)
+    search_results = [] if args.no_search else run_search(args.epd, args.depth, args.positions)
+    report = {
+        'perft': perft_results,
+        'search': search_results,
+        'summary': summarize(perft_results, search_results),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(text + '\n')
+    else:
+        print(text)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+# A board drawn by a single widget instead of 64 buttons. BoardRenderer paints a
+# position from cached pixmaps into any QPainter; BoardView uses it in paintEvent,
+# repainting only the squares that changed, animating moves and scaling with the
+# window. Without a widget the renderer produces images, e.g. thumbnails of every
+# position in a game archive:
+#   python -m chessgame.board_view games.pgn --output-dir thumbnails --size 160
+import argparse
+import os
+import re
+import chess
+from PyQt5.QtGui import QColor, QFont, QImage, QPainter, QPixmap, QRegion
+from PyQt5.QtCore import QPoint, QRect, QSize, QVariantAnimation, Qt
+from .piece_icons import piece_pixmap
+from .ui import ChessBoard, EngineChessBoard
+
+class BoardRenderer:
+    # Square colours and piece images are drawn once per square size and reused;
+    # after that a repaint is a handful of pixmap blits.
+    DEFAULT_COLORS = ('white', 'gray')
+    HIGHLIGHT_COLOR = 'lightgreen'
+
+    def __init__(self, square_size=60, icons=True, colors=DEFAULT_COLORS):
+        self.icons = icons
+        self.colors = [QColor(color or default) for color, default in zip(colors, self.DEFAULT_COLORS)]
+        self.highlight = QColor(self.HIGHLIGHT_COLOR)
+        self.square_size = None
+        self.set_square_size(square_size)
+
+    def set_square_size(self, square_size):
+        square_size = max(square_size, 1)
+        if square_size == self.square_size:
+            return
+        self.square_size = square_size
+        self.background = None
+        self.pixmaps = {}
+
+    def board_size(self):
+        return 8 * self.square_size
+
+    def square_rect(self, square):
+        size = self.square_size
+        return QRect(chess.square_file(square) * size, (7 - chess.square_rank(square)) * size, size, size)
+
+    def square_at(self, point):
+        col, row = point.x() // self.square_size, point.y() // self.square_size
+        if 0 <= col < 8 and 0 <= row < 8 and point.x() >= 0 and point.y() >= 0:
+            return chess.square(col, 7 - row)
+        return None
+
+    def board_background(self):
+        if self.background is None:
+            self.background = QPixmap(self.board_size(), self.board_size())
+            painter = QPainter(self.background)
+            for square in chess.SQUARES:
+                row, col = 7 - chess.square_rank(square), chess.square_file(square)
+                painter.fillRect(self.square_rect(square), self.colors[(row + col) % 2])
+            painter.end()
+        return self.background
+
+    def piece_pixmap(self, piece):
+        # The piece image scaled to the square, or None to draw its letter instead.
+        if piece not in self.pixmaps:
+            pixmap = piece_pixmap(piece) if self.icons else None
+            if pixmap is not None:
+                pixmap = pixmap.scaled(self.square_size, self.square_size, Qt.KeepAspectRatio,
+                                       Qt.SmoothTransformation)
+            self.pixmaps[piece] = pixmap
+        return self.pixmaps[piece]
+
+    def paint_piece(self, painter, piece, rect):
+        pixmap = self.piece_pixmap(piece)
+        if pixmap is None:
+            font = QFont(painter.font())
+            font.setPixelSize(max(self.square_size * 3 // 5, 1))
+            painter.setFont(font)
+            painter.setPen(Qt.black)
+            painter.drawText(rect, Qt.AlignCenter, str(piece))
+        else:
+            painter.drawPixmap(rect.x() + (rect.width() - pixmap.width()) // 2,
+                               rect.y() + (rect.height() - pixmap.height()) // 2, pixmap)
+
+    def paint(self, painter, board, rect=None, highlighted=(), hidden=()):
+        # Paints the squares that intersect rect (the whole board by default),
+        # leaving out the pieces on the hidden squares.
+        if rect is None:
+            rect = QRect(0, 0, self.board_size(), self.board_size())
+        painter.drawPixmap(rect, self.board_background(), rect)
+        for square in chess.SQUARES:
+            square_rect = self.square_rect(square)
+            if not square_rect.intersects(rect):
+                continue
+            if square in highlighted:
+                painter.fillRect(square_rect, self.highlight)
+            piece = board.piece_at(square)
+            if piece is not None and square not in hidden:
+                self.paint_piece(painter, piece, square_rect)
+
+    def render(self, board, highlighted=()):
+        image = QImage(self.board_size(), self.board_size(), QImage.Format_ARGB32_Premultiplied)
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        self.paint(painter, board, highlighted=highlighted)
+        painter.end()
+        return image
+
+class BoardView(ChessBoard):
+    # The same board and click handling as ChessBoard, painted in one paintEvent.
+    # Restyling a square or moving a piece only invalidates the squares involved.
+    ANIMATION_MS = 150
+
+    def __init__(self, square_size=(60, 60), **kwargs):
+        super().__init__(square_size=square_size, **kwargs)
+
+    def initUI(self, geometry):
+        self.renderer = BoardRenderer(min(self.square_size), self.icons, self.colors)
+        self.drawn_pieces = [None] * 64
+        self.moves_from = None
+        self.highlighted = set()
+        self.last_move = None
+        self.animated = None
+        self.animation = QVariantAnimation(self)
+        self.animation.setStartValue(0.0)
+        self.animation.setEndValue(1.0)
+        self.animation.setDuration(self.ANIMATION_MS)
+        self.animation.valueChanged.connect(self.animate_step)
+        self.animation.finished.connect(self.finish_animation)
+        self.setMinimumSize(64, 64)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+
+        self.update_board()
+        self.setWindowTitle('Chess Board')
+        self.setGeometry(*geometry)
+
+    def sizeHint(self):
+        size = 8 * min(self.square_size)
+        return QSize(size, size)
+
+    def board_origin(self):
+        # The board is centred in the widget.
+        size = self.renderer.board_size()
+        return QPoint((self.width() - size) // 2, (self.height() - size) // 2)
+
+    def update_square(self, square):
+        self.update(self.renderer.square_rect(square).translated(self.board_origin()))
+
+    def set_square_style(self, square, highlighted):
+        self.update_square(square)
+
+    def update_board(self):
+        self.moves_from = None
+        for square in chess.SQUARES:
+            piece = self.board.piece_at(square)
+            if piece != self.drawn_pieces[square]:
+                self.update_square(square)
+                self.drawn_pieces[square] = piece
+        # A new last move slides into place; anything else (a reset, a takeback)
+        # just appears.
+        move = self.board.peek() if self.board.move_stack else None
+        if move is not None and move != self.last_move and self.ANIMATION_MS > 0:
+            self.start_animation(move)
+        self.last_move = move
+
+    def start_animation(self, move):
+        if self.animated is not None:
+            self.animation.stop()
+            self.finish_animation()
+        piece = self.board.piece_at(move.to_square)
+        if piece is None:
+            return
+        start = self.renderer.square_rect(move.from_square)
+        self.animated = (piece, move.to_square, start.topLeft(), self.renderer.square_rect(move.to_square).topLeft())
+        self.animation_rect = start
+        self.animation.start()
+
+    def animate_step(self, value):
+        if self.animated is None:
+            return
+        _, _, start, end = self.animated
+        size = self.renderer.square_size
+        rect = QRect(start + (end - start) * value, QSize(size, size))
+        # Both the old and the new frame of the moving piece need repainting.
+        self.update(self.animation_rect.united(rect).translated(self.board_origin()))
+        self.animation_rect = rect
+
+    def finish_animation(self):
+        if self.animated is None:
+            return
+        self.update(self.animation_rect.translated(self.board_origin()))
+        self.update_square(self.animated[1])
+        self.animated = None
+
+    def resizeEvent(self, event):
+        self.renderer.set_square_size(min(self.width(), self.height()) // 8)
+        if self.animated is not None:
+            self.animation.stop()
+            self.animated = None
+        self.update()
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        origin = self.board_origin()
+        board_rect = QRect(origin, QSize(self.renderer.board_size(), self.renderer.board_size()))
+        # The margins around a board that does not fill the widget.
+        outside = event.region().subtracted(QRegion(board_rect))
+        for rect in outside.rects():
+            painter.fillRect(rect, self.palette().window())
+        painter.translate(origin)
+        rect = event.rect().translated(-origin).intersected(board_rect.translated(-origin))
+        hidden = ()
+        if self.animated is not None:
+            hidden = (self.animated[1],)
+        self.renderer.paint(painter, self.board, rect, self.highlighted, hidden)
+        if self.animated is not None:
+            self.renderer.paint_piece(painter, self.animated[0], self.animation_rect)
+        painter.end()
+
+    def mousePressEvent(self, event):
+        square = self.renderer.square_at(event.pos() - self.board_origin())
+        if square is not None:
+            self.handle_square_click(square)
+
+class EngineBoardView(EngineChessBoard, BoardView):
+    # EngineChessBoard's engine play on the painted board.
+    pass
+
+def thumbnail_name(position_id):
+    return re.sub(r'[^\w.-]', '_', position_id) + '.png'
+
+def render_thumbnails(positions, output_dir, size=160, icons=True):
+    # Writes one PNG per (id, fen) and yields the file names. One renderer serves
+    # every position, so the pieces are scaled only once.
+    renderer = BoardRenderer(size // 8, icons)
+    os.makedirs(output_dir, exist_ok=True)
+    for position_id, fen in positions:
+        path = os.path.join(output_dir, thumbnail_name(position_id))
+        if not renderer.render(chess.Board(fen)).save(path):
+            raise OSError(f'could not write {path}')
+        yield path
+
+def main():
+    parser = argparse.ArgumentParser(description='Render board thumbnails for the positions of an EPD or PGN file.')
+    parser.add_argument('input', help='EPD or PGN file')
+    parser.add_argument('--output-dir', default='thumbnails', help='directory for the PNG files')
+    parser.add_argument('--size', type=int, default=160, help='board size in pixels')
+    parser.add_argument('--min-ply', type=int, default=0, help='skip the first plies of every PGN game')
+    parser.add_argument('--step', type=int, default=1, help='render every step-th position')
+    parser.add_argument('--letters', action='store_true', help='draw piece letters instead of images')
+    args = parser.parse_args()
+
+    # Rendering needs a QGuiApplication but no display.
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtGui import QGuiApplication
+    from .analyse import read_positions
+    app = QGuiApplication([])
+    positions = (position for index, position in enumerate(read_positions(args.input, args.min_ply))
+                 if index % args.step == 0)
+    count = sum(1 for _ in render_thumbnails(positions, args.output_dir, args.size, not args.letters))
+    print(f'{count} thumbnails written to {args.output_dir}')
+
+if __name__ == '__main__':
+    main()
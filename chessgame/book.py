@@ -0,0 +1,100 @@
+# Polyglot opening book support for ChessEngine: lookup in a memory-mapped .bin
+# book, and a builder that turns a local PGN collection into such a book, e.g.
+#   python -m chessgame.book games.pgn more_games.pgn --output book.bin --max-ply 24
+import argparse
+import random
+import struct
+from collections import defaultdict
+import chess
+import chess.pgn
+import chess.polyglot
+
+ENTRY = struct.Struct('>QHHI')
+MAX_WEIGHT = 0xffff
+
+class OpeningBook:
+    def __init__(self, path, weighted=True, rng=None):
+        # The reader mmaps the file and binary-searches it by Zobrist key, so a
+        # lookup costs a handful of page reads regardless of the book size.
+        self.reader = chess.polyglot.open_reader(path)
+        self.weighted = weighted
+        self.rng = rng if rng is not None else random.Random()
+
+    def close(self):
+        self.reader.close()
+
+    def choose(self, board):
+        # Returns a book move for the position, or None when it is out of book.
+        try:
+            if self.weighted:
+                return self.reader.weighted_choice(board, random=self.rng).move
+            return self.reader.find(board).move
+        except IndexError:
+            return None
+
+def encode_move(board, move):
+    # Polyglot encodes castling as the king capturing its own rook.
+    to_square = move.to_square
+    if board.is_castling(move) and not board.chess960:
+        to_square = chess.square(7 if chess.square_file(move.to_square) == 6 else 0,
+                                 chess.square_rank(move.from_square))
+    promotion = move.promotion - 1 if move.promotion else 0
+    return to_square | move.from_square << 6 | promotion << 12
+
+def game_weights(pgn_paths, max_ply):
+    # weights[key][raw_move] adds 2 for every win and 1 for every draw the move
+    # scored for the side that played it.
+    weights = defaultdict(lambda: defaultdict(int))
+    for path in pgn_paths:
+        with open(path) as pgn_file:
+            while True:
+                game = chess.pgn.read_game(pgn_file)
+                if game is None:
+                    break
+                result = game.headers.get('Result', '*')
+                if result not in ('1-0', '0-1', '1/2-1/2'):
+                    continue
+                board = game.board()
+                for ply, move in enumerate(game.mainline_moves()):
+                    if ply >= max_ply:
+                        break
+                    if result == '1/2-1/2':
+                        score = 1
+                    elif (result == '1-0') == (board.turn == chess.WHITE):
+                        score = 2
+                    else:
+                        score = 0
+                    raw_move = encode_move(board, move)
+                    weights[chess.polyglot.zobrist_hash(board)][raw_move] += score
+                    board.push(move)
+    return weights
+
+def build_book(pgn_paths, output_path, max_ply=20, min_weight=1):
+    weights = game_weights(pgn_paths, max_ply)
+    largest = max((weight for moves in weights.values() for weight in moves.values()), default=0)
+    scale = MAX_WEIGHT / largest if largest > MAX_WEIGHT else 1
+    entries = []
+    for key, moves in weights.items():
+        for raw_move, weight in moves.items():
+            weight = int(weight * scale)
+            if weight >= min_weight:
+                entries.append((key, -weight, raw_move))
+    # Polyglot readers expect the entries sorted by key, best move first.
+    entries.sort()
+    with open(output_path, 'wb') as book_file:
+        for key, weight, raw_move in entries:
+            book_file.write(ENTRY.pack(key, raw_move, -weight, 0))
+    return len(entries)
+
+def main():
+    parser = argparse.ArgumentParser(description='Build a Polyglot opening book from PGN files.')
+    parser.add_argument('pgn', nargs='+', help='PGN files to read')
+    parser.add_argument('--output', default='book.bin', help='book file to write')
+    parser.add_argument('--max-ply', type=int, default=20, help='only use the first N plies of each game')
+    parser.add_argument('--min-weight', type=int, default=1, help='drop moves with a smaller weight')
+    args = parser.parse_args()
+    count = build_book(args.pgn, args.output, args.max_ply, args.min_weight)
+    print(f"Wrote {count} entries to {args.output}")
+
+if __name__ == '__main__':
+    main()
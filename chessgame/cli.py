@@ -0,0 +1,88 @@
+# Terminal game against the engine: the human plays White in UCI notation and the
+# engine ponders while waiting for input.
+import os
+import threading
+import chess
+from .engine import ChessEngine
+
+class PonderSearch:
+    # Searches on the human's time in a background thread: the position after the
+    # expected reply, or the human's own position when there is no expected reply,
+    # which still leaves the transposition table warm for every reply.
+    def __init__(self, engine, board, expected_move):
+        self.engine = engine
+        self.expected_move = expected_move
+        self.board = board.copy()
+        if expected_move is not None:
+            self.board.push(expected_move)
+        self.result = None
+        self.search_id = engine.request_search()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        self.result = self.engine.search(self.board, ponder=True, search_id=self.search_id)
+
+    def is_hit(self, board):
+        return self.expected_move is not None and board.move_stack[-1:] == [self.expected_move]
+
+    def finish(self, movetime_ms):
+        self.engine.ponderhit(movetime_ms)
+        self.thread.join()
+        return self.result
+
+    def stop(self):
+        self.engine.stop()
+        self.thread.join()
+
+def main():
+    # Initialize the chess engine
+    engine = ChessEngine(max_depth=5,  # Adjust depth as needed
+                         book_path=os.environ.get('CHESS_BOOK'), tablebase_path=os.environ.get('SYZYGY_PATH'))
+
+    # Initialize the chessboard
+    board = chess.Board()
+    ponder = None
+
+    # Game loop
+    while not board.is_game_over():
+        print(board)
+
+        move = None
+
+        if board.turn == chess.WHITE:
+            # Human player's move
+            move_uci = input("Enter your move in UCI notation (e.g. e2e4): ").lower()
+
+            if len(move_uci) == 4 and move_uci[0] in chess.FILE_NAMES and move_uci[2] in chess.FILE_NAMES \
+                    and move_uci[1] in chess.RANK_NAMES and move_uci[3] in chess.RANK_NAMES:
+                from_square = chess.square(ord(move_uci[0]) - ord('a'), int(move_uci[1]) - 1)
+                to_square = chess.square(ord(move_uci[2]) - ord('a'), int(move_uci[3]) - 1)
+                move = chess.Move(from_square, to_square)
+
+                if move in board.legal_moves:
+                    board.push(move)
+                else:
+                    print("Illegal move, try again.")
+            else:
+                print("Invalid move format, try again.")
+        else:
+            # Engine's move, straight from the ponder search if the human played
+            # the expected reply
+            if ponder is not None and ponder.is_hit(board):
+                result = ponder.finish(3000)
+            else:
+                if ponder is not None:
+                    ponder.stop()
+                result = engine.search(board, movetime_ms=3000)
+            board.push(result.move)
+            if not board.is_game_over():
+                ponder = PonderSearch(engine, board, result.pv[1] if len(result.pv) > 1 else None)
+
+    if ponder is not None:
+        ponder.stop()
+    print("Game Over")
+    print("Result: ", board.result())
+
+if __name__ == '__main__':
+    main()
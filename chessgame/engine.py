@@ -0,0 +1,1043 @@
+# The chess engine shared by every front-end and tool. Only python-chess and the
+# position module are imported up front; multiprocessing, the opening book, the
+# tablebases and the analysis cache are imported when a search first needs them.
+import queue
+import threading
+import time
+from collections import namedtuple
+import chess
+from .position import CAPTURE_FLAG, Position, to_chess_move
+
+EXACT = 0
+LOWERBOUND = 1
+UPPERBOUND = 2
+
+# Piece-square tables from White's point of view, a8 first so they read like a board.
+PIECE_SQUARE_TABLES = {
+    chess.PAWN: [
+        0, 0, 0, 0, 0, 0, 0, 0,
+        50, 50, 50, 50, 50, 50, 50, 50,
+        10, 10, 20, 30, 30, 20, 10, 10,
+        5, 5, 10, 25, 25, 10, 5, 5,
+        0, 0, 0, 20, 20, 0, 0, 0,
+        5, -5, -10, 0, 0, -10, -5, 5,
+        5, 10, 10, -20, -20, 10, 10, 5,
+        0, 0, 0, 0, 0, 0, 0, 0,
+    ],
+    chess.KNIGHT: [
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20, 0, 0, 0, 0, -20, -40,
+        -30, 0, 10, 15, 15, 10, 0, -30,
+        -30, 5, 15, 20, 20, 15, 5, -30,
+        -30, 0, 15, 20, 20, 15, 0, -30,
+        -30, 5, 10, 15, 15, 10, 5, -30,
+        -40, -20, 0, 5, 5, 0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50,
+    ],
+    chess.BISHOP: [
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 10, 10, 5, 0, -10,
+        -10, 5, 5, 10, 10, 5, 5, -10,
+        -10, 0, 10, 10, 10, 10, 0, -10,
+        -10, 10, 10, 10, 10, 10, 10, -10,
+        -10, 5, 0, 0, 0, 0, 5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20,
+    ],
+    chess.ROOK: [
+        0, 0, 0, 0, 0, 0, 0, 0,
+        5, 10, 10, 10, 10, 10, 10, 5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        0, 0, 0, 5, 5, 0, 0, 0,
+    ],
+    chess.QUEEN: [
+        -20, -10, -10, -5, -5, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 5, 5, 5, 0, -10,
+        -5, 0, 5, 5, 5, 5, 0, -5,
+        0, 0, 5, 5, 5, 5, 0, -5,
+        -10, 5, 5, 5, 5, 5, 0, -10,
+        -10, 0, 5, 0, 0, 0, 0, -10,
+        -20, -10, -10, -5, -5, -10, -10, -20,
+    ],
+    chess.KING: [
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+        20, 20, 0, 0, 0, 0, 20, 20,
+        20, 30, 10, 0, 0, 10, 30, 20,
+    ],
+}
+
+def build_piece_square_values(piece_values):
+    values = {chess.WHITE: {}, chess.BLACK: {}}
+    for piece_type, table in PIECE_SQUARE_TABLES.items():
+        value = piece_values[piece_type]
+        values[chess.WHITE][piece_type] = [value + table[square ^ 56] for square in chess.SQUARES]
+        values[chess.BLACK][piece_type] = [-value - table[square] for square in chess.SQUARES]
+    return values
+
+def index_by_code(values):
+    # Re-indexes values[color][piece_type] by the piece codes used in Position.
+    table = [[0] * 64 for _ in range(16)]
+    for color, by_type in values.items():
+        for piece_type, squares in by_type.items():
+            table[piece_type | color << 3] = squares
+    return table
+
+class TranspositionTable:
+    def __init__(self, size):
+        self.size = self.slots(size)
+        self.mask = self.size - 1
+        self.entries = [None] * self.size
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+
+    @staticmethod
+    def slots(size):
+        # Round down to a power of two so a key can be mapped to a slot with a mask.
+        return 1 << (max(size, 1).bit_length() - 1)
+
+    def clear(self):
+        self.entries = [None] * self.size
+        self.generation = 0
+
+    def new_search(self):
+        self.generation = (self.generation + 1) & 0xff
+        self.probes = 0
+        self.hits = 0
+
+    def probe(self, key):
+        self.probes += 1
+        entry = self.entries[key & self.mask]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def store(self, key, depth, flag, score, move):
+        index = key & self.mask
+        entry = self.entries[index]
+        # Depth-preferred replacement, but entries left over from earlier searches
+        # are always overwritten so the table does not fill up with stale results.
+        if entry is None or entry[5] != self.generation or depth >= entry[1] \
+                or (entry[0] == key and flag == EXACT):
+            self.entries[index] = (key, depth, flag, score, move, self.generation)
+
+    def hashfull(self):
+        # Permille of sampled slots written during the current search, as UCI reports it.
+        sample = self.entries[:min(self.size, 1000)]
+        used = sum(1 for entry in sample if entry is not None and entry[5] == self.generation)
+        return used * 1000 // len(sample)
+
+class MoveOrderer:
+    # Scores a move list so that the hash move comes first, then captures by
+    # MVV-LVA, promotions, killer moves and finally quiet moves by history.
+    HASH_MOVE = 1 << 30
+    CAPTURE = 1 << 29
+    PROMOTION = 1 << 28
+    KILLER = 1 << 27
+
+    def __init__(self, max_ply=128):
+        self.max_ply = max_ply
+        self.killers = [[None, None] for _ in range(max_ply)]
+        self.history = [[0] * 4096, [0] * 4096]
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    def new_search(self):
+        self.killers = [[None, None] for _ in range(self.max_ply)]
+        for table in self.history:
+            for index in range(4096):
+                table[index] >>= 1
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    def first_move_cutoff_rate(self):
+        if not self.cutoffs:
+            return 0.0
+        return self.first_move_cutoffs / self.cutoffs
+
+    def order(self, position, hash_move, ply):
+        # Moves are Position's int moves and may still be pseudo-legal.
+        killers = self.killers[ply] if ply < self.max_ply else (None, None)
+        history = self.history[position.turn]
+        squares = position.squares
+        scored = []
+        for move in position.generate_moves():
+            if move == hash_move:
+                score = self.HASH_MOVE
+            elif move & CAPTURE_FLAG:
+                victim = squares[(move >> 6) & 63] & 7 or chess.PAWN
+                attacker = squares[move & 63] & 7
+                score = self.CAPTURE + victim * 8 - attacker
+            elif move & 0x7000:
+                score = self.PROMOTION + (move >> 12)
+            elif move == killers[0]:
+                score = self.KILLER + 1
+            elif move == killers[1]:
+                score = self.KILLER
+            else:
+                score = history[move & 4095]
+            scored.append((score, move))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [move for _, move in scored]
+
+    def order_captures(self, position):
+        # Move list for the quiescence search: captures by MVV-LVA, then quiet
+        # queen promotions.
+        squares = position.squares
+        scored = []
+        for move in position.generate_moves(captures_only=True):
+            if move & CAPTURE_FLAG:
+                victim = squares[(move >> 6) & 63] & 7 or chess.PAWN
+                scored.append((victim * 8 - (squares[move & 63] & 7), move))
+            else:
+                scored.append((-1, move))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [move for _, move in scored]
+
+    def record_cutoff(self, position, move, depth, ply, index):
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+        if move & (CAPTURE_FLAG | 0x7000):
+            return
+        if ply < self.max_ply:
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+        history = self.history[position.turn]
+        slot = move & 4095
+        history[slot] = min(history[slot] + depth * depth, self.KILLER - 1)
+
+class SearchTimeout(Exception):
+    pass
+
+SearchResult = namedtuple('SearchResult', ['move', 'score', 'depth', 'pv', 'nodes'])
+
+class SearchStats:
+    # Counters for the current search. ChessEngine.nodes stays on the engine
+    # because the limit checks read it on every node.
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.qnodes = 0
+        self.seldepth = 0
+        self.null_cutoffs = 0
+        self.futility_prunes = 0
+        self.lmr_researches = 0
+        # One dict per completed iteration, as passed to info and the observers.
+        self.iterations = []
+
+    def as_dict(self):
+        return {
+            'qnodes': self.qnodes,
+            'seldepth': self.seldepth,
+            'null_cutoffs': self.null_cutoffs,
+            'futility_prunes': self.futility_prunes,
+            'lmr_researches': self.lmr_researches,
+            'iterations': self.iterations,
+        }
+
+# Per-process state for root-parallel search. Each pool process keeps a single
+# engine, so its transposition table stays warm across moves and its memory stays
+# at one table whatever the searches ask for.
+worker_engine = None
+worker_settings = None
+worker_stop_event = None
+worker_info_queue = None
+
+def init_search_worker(stop_event, info_queue, started):
+    global worker_stop_event, worker_info_queue
+    worker_stop_event = stop_event
+    worker_info_queue = info_queue
+    started.release()
+
+def report_from_worker(tag, iterations, data):
+    # Completed iterations also go back to the parent as they happen, so it can
+    # report progress before the whole search is done.
+    iterations.append(data)
+    worker_info_queue.put((tag, data))
+
+def configure_worker(settings):
+    # settings is (tt_size, null_move, late_move_reductions, futility_pruning,
+    # tablebase_path, cache_path, game_number). The worker engine is changed in
+    # place to match; a new game number clears its table.
+    global worker_engine, worker_settings
+    tt_size, null_move, late_move_reductions, futility_pruning, tablebase_path, cache_path, game_number = settings
+    if worker_engine is None:
+        worker_engine = ChessEngine(0, tt_size)
+        worker_engine.stop_event = worker_stop_event
+    elif settings != worker_settings:
+        worker_engine.resize_table(tt_size)
+        if game_number != worker_settings[-1]:
+            worker_engine.new_game()
+    worker_engine.null_move = null_move
+    worker_engine.late_move_reductions = late_move_reductions
+    worker_engine.futility_pruning = futility_pruning
+    worker_engine.set_tablebase(tablebase_path)
+    worker_engine.set_cache(cache_path)
+    worker_settings = settings
+    return worker_engine
+
+def prepare_worker(settings):
+    configure_worker(settings)
+
+def search_in_worker(board, root_moves, settings, max_depth, deadline, nodes, tag):
+    # deadline is on the parent's time.monotonic() clock, which processes on one
+    # machine share, so time spent before this process got the task is charged.
+    engine = configure_worker(settings)
+    engine.max_depth = max_depth
+    movetime_ms = max((deadline - time.monotonic()) * 1000.0, 1.0) if deadline is not None else None
+    iterations = []
+    engine.search(board, movetime_ms, nodes, info=lambda data: report_from_worker(tag, iterations, data),
+                  root_moves=root_moves)
+    return iterations, engine.nodes
+
+class ChessEngine:
+    def __init__(self, max_depth, tt_size=1 << 18, move_orderer=None, workers=1,
+                 null_move=True, late_move_reductions=True, futility_pruning=True,
+                 book_path=None, book_weighted=True, tablebase_path=None, cache_path=None):
+        if move_orderer is not None and workers > 1:
+            # The pool processes build their own engines and could not share it.
+            raise ValueError('a custom move_orderer cannot be used with workers > 1')
+        self.max_depth = max_depth
+        self.book_path = None
+        self.book = None
+        self.set_book(book_path, book_weighted)
+        self.tablebase_path = None
+        self.tablebase = None
+        self.set_tablebase(tablebase_path)
+        self.cache_path = None
+        self.analysis_cache = None
+        self.set_cache(cache_path)
+        self.game_number = 0
+        self.null_move = null_move
+        self.late_move_reductions = late_move_reductions
+        self.futility_pruning = futility_pruning
+        self.workers = workers
+        self.executor = None
+        self.pool_lock = threading.Lock()
+        self.pool_thread = None
+        self.stop_event = None
+        self.info_queue = None
+        self.transposition_table = TranspositionTable(tt_size)
+        self.move_orderer = move_orderer if move_orderer is not None else MoveOrderer()
+        self.nodes = 0
+        self.deadline = None
+        self.node_limit = None
+        self.next_check = 0
+        self.search_start = 0.0
+        self.ponder_hit = False
+        self.iteration_best = None
+        self.last_search_id = 0
+        self.stopped_search_id = 0
+        self.search_id = 0
+        self.stats = SearchStats()
+        self.observers = []
+
+    MAX_DEPTH = 64
+    CHECK_INTERVAL = 1024
+    PROGRESS_INTERVAL = 0.05
+    PONDERHIT_MS = 100
+    PONDERHIT_MIN_DEPTH = 4
+    DELTA_MARGIN = 200
+    ASPIRATION_WINDOW = 50
+    NULL_MOVE_REDUCTION = 2
+    FUTILITY_MARGINS = (0, 150, 300, 500)
+    INFINITE = 1000000
+    MATE_SCORE = 100000
+    TABLEBASE_WIN = 50000
+
+    PIECE_VALUES = {
+        chess.PAWN: 100,
+        chess.KNIGHT: 320,
+        chess.BISHOP: 330,
+        chess.ROOK: 500,
+        chess.QUEEN: 900,
+        chess.KING: 20000
+    }
+
+    # PIECE_SQUARE_VALUES[color][piece_type][square] is material plus placement,
+    # signed from White's point of view.
+    PIECE_SQUARE_VALUES = build_piece_square_values(PIECE_VALUES)
+    SQUARE_VALUES = index_by_code(PIECE_SQUARE_VALUES)
+
+    def evaluate_board(self, board):
+        # Full evaluation from the side to move's point of view. The search keeps
+        # the same score incrementally in Position.score instead.
+        score = 0
+        for color in chess.COLORS:
+            for piece_type in chess.PIECE_TYPES:
+                table = self.PIECE_SQUARE_VALUES[color][piece_type]
+                for square in chess.scan_forward(board.pieces_mask(piece_type, color)):
+                    score += table[square]
+        return score if board.turn == chess.WHITE else -score
+
+    def evaluate(self, position):
+        # Position keeps the evaluate_board score up to date on every make/unmake.
+        return position.score if position.turn else -position.score
+
+    def add_observer(self, observer):
+        # observer(data) is called for every completed iteration of every search,
+        # with the same dict a search's info callback gets.
+        self.observers.append(observer)
+
+    def remove_observer(self, observer):
+        self.observers.remove(observer)
+
+    def report(self, info, data):
+        if info is not None:
+            info(data)
+        for observer in self.observers:
+            observer(data)
+
+    def request_search(self):
+        # Ids number searches in the order they were asked for. A caller that runs
+        # the search on another thread takes the id first and passes it to
+        # search(), so a stop() that comes before the thread starts is not lost.
+        self.last_search_id += 1
+        return self.last_search_id
+
+    def stop(self):
+        # Safe to call from another thread. Stops the running search and any
+        # search already requested; the search notices it at its next check.
+        self.stopped_search_id = self.last_search_id
+        if self.executor is not None:
+            self.stop_event.set()
+
+    def set_book(self, book_path, weighted=True):
+        # The set_* methods swap a resource on a live engine; None removes it and
+        # the path already in use is kept open. If the new one cannot be opened
+        # the engine is left without one.
+        if book_path == self.book_path:
+            return
+        if self.book is not None:
+            self.book.close()
+            self.book = None
+        self.book_path = None
+        if book_path is not None:
+            from .book import OpeningBook
+            self.book = OpeningBook(book_path, weighted)
+            self.book_path = book_path
+
+    def set_tablebase(self, tablebase_path):
+        if tablebase_path == self.tablebase_path:
+            return
+        if self.tablebase is not None:
+            self.tablebase.close()
+            self.tablebase = None
+        self.tablebase_path = None
+        if tablebase_path is not None:
+            from .tablebase import Tablebase
+            self.tablebase = Tablebase(tablebase_path)
+            self.tablebase_path = tablebase_path
+
+    def set_cache(self, cache_path):
+        if cache_path == self.cache_path:
+            return
+        if self.analysis_cache is not None:
+            self.analysis_cache.close()
+            self.analysis_cache = None
+        self.cache_path = None
+        if cache_path is not None:
+            from .analysis_cache import AnalysisCache
+            self.analysis_cache = AnalysisCache(cache_path)
+            self.cache_path = cache_path
+
+    def resize_table(self, tt_size):
+        # A new size starts from an empty table; the same size keeps the entries.
+        if TranspositionTable.slots(tt_size) != self.transposition_table.size:
+            self.transposition_table = TranspositionTable(tt_size)
+
+    def new_game(self):
+        # Forgets the previous game: the table here now, the pool processes' tables
+        # at their next search.
+        self.transposition_table.clear()
+        self.game_number += 1
+
+    def close(self):
+        with self.pool_lock:
+            if self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None
+            self.pool_thread = None
+        self.set_book(None)
+        self.set_tablebase(None)
+        self.set_cache(None)
+
+    def book_move(self, board, root_moves=None):
+        if self.book is None:
+            return None
+        move = self.book.choose(board)
+        if move is None or (root_moves is not None and move not in root_moves):
+            return None
+        return move
+
+    def tablebase_move(self, board, root_moves=None):
+        if self.tablebase is None:
+            return None
+        probe = self.tablebase.probe_root(board, root_moves)
+        if probe is None:
+            return None
+        move, wdl = probe
+        return SearchResult(move, self.tablebase_score(wdl, 0), 0, [move], 0)
+
+    def tablebase_score(self, wdl, ply):
+        # Cursed wins and blessed losses are draws under the fifty-move rule.
+        if wdl == 2:
+            return self.TABLEBASE_WIN - ply
+        if wdl == -2:
+            return -self.TABLEBASE_WIN + ply
+        return 0
+
+    def check_limits(self):
+        if self.search_id <= self.stopped_search_id:
+            raise SearchTimeout()
+        if self.stop_event is not None and self.stop_event.is_set():
+            raise SearchTimeout()
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            raise SearchTimeout()
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise SearchTimeout()
+        self.next_check = self.nodes + self.CHECK_INTERVAL
+        if self.node_limit is not None:
+            self.next_check = min(self.next_check, self.node_limit)
+
+    def see(self, position, move):
+        # Static exchange evaluation: the material balance of the capture sequence on
+        # the target square when both sides always recapture with their cheapest piece.
+        from_square = move & 63
+        to_square = (move >> 6) & 63
+        squares = position.squares
+        bitboards = position.bitboards
+        occupied = position.occupied
+        if squares[to_square]:
+            gain = [self.PIECE_VALUES[squares[to_square] & 7]]
+        else:
+            gain = [self.PIECE_VALUES[chess.PAWN]]
+            occupied ^= 1 << (to_square - 8 if position.turn else to_square + 8)
+        attacker_type = squares[from_square] & 7
+        from_mask = 1 << from_square
+        color = position.turn
+        depth = 0
+        while from_mask:
+            depth += 1
+            gain.append(self.PIECE_VALUES[attacker_type] - gain[depth - 1])
+            if max(-gain[depth - 1], gain[depth]) < 0:
+                break
+            occupied ^= from_mask
+            color ^= 1
+            attackers = position.attackers_mask(to_square, occupied) & position.occupied_co[color]
+            from_mask = 0
+            for piece_type in chess.PIECE_TYPES:
+                candidates = attackers & bitboards[piece_type | color << 3]
+                if candidates:
+                    from_mask = candidates & -candidates
+                    attacker_type = piece_type
+                    break
+        while depth > 1:
+            depth -= 1
+            gain[depth - 1] = -max(-gain[depth - 1], gain[depth])
+        return gain[0]
+
+    def quiescence(self, position, alpha, beta, ply):
+        # Searches captures and promotions until the position is quiet, so leaves are
+        # never evaluated in the middle of an exchange. Scores are from the side to
+        # move's point of view.
+        self.nodes += 1
+        if self.nodes >= self.next_check:
+            self.check_limits()
+        stats = self.stats
+        stats.qnodes += 1
+        if ply > stats.seldepth:
+            stats.seldepth = ply
+
+        stand_pat = self.evaluate(position)
+        if stand_pat >= beta:
+            return stand_pat
+        # Delta pruning: not even winning a queen would bring the score up to alpha.
+        if stand_pat + self.PIECE_VALUES[chess.QUEEN] + self.DELTA_MARGIN < alpha:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+
+        best_score = stand_pat
+        squares = position.squares
+        for move in self.move_orderer.order_captures(position):
+            if move & CAPTURE_FLAG:
+                captured = squares[(move >> 6) & 63] & 7 or chess.PAWN
+                if stand_pat + self.PIECE_VALUES[captured] + self.DELTA_MARGIN < alpha:
+                    continue
+                if self.see(position, move) < 0:
+                    continue
+            if not position.make(move):
+                continue
+            score = -self.quiescence(position, -beta, -alpha, ply + 1)
+            position.unmake()
+            if score > best_score:
+                best_score = score
+            if score >= beta:
+                break
+            alpha = max(alpha, score)
+        return best_score
+
+    def alphabeta(self, position, depth, alpha, beta, ply=1, allow_null=True):
+        # Negamax principal variation search: scores are from the side to move's
+        # point of view. The first move gets the full window; the rest are searched
+        # with a null window and only re-searched if they land inside (alpha, beta).
+        self.nodes += 1
+        if self.nodes >= self.next_check:
+            self.check_limits()
+
+        # Draws need no move generation; checkmate and stalemate are found below
+        # once the moves are generated anyway. A mate on the hundredth ply still counts.
+        if position.is_insufficient_material() or position.is_repetition():
+            return 0
+        if position.halfmove_clock >= 100:
+            return -self.MATE_SCORE + ply if position.in_check() and not position.has_legal_move() else 0
+
+        if depth == 0:
+            return self.quiescence(position, alpha, beta, ply)
+
+        # Right after a capture or pawn move the tables give the exact result,
+        # so there is nothing left to search below this node.
+        tablebase = self.tablebase
+        if tablebase is not None and position.halfmove_clock == 0 and tablebase.covers(position):
+            wdl = tablebase.probe_wdl(position)
+            if wdl is not None:
+                return self.tablebase_score(wdl, ply)
+
+        key = position.key
+        entry = self.transposition_table.probe(key)
+        if entry is None and self.analysis_cache is not None and beta - alpha > 1:
+            entry = self.probe_cache(key)
+        hash_move = None
+        if entry is not None:
+            hash_move = entry[4]
+            if entry[1] >= depth:
+                flag, score = entry[2], self.score_from_table(entry[3], ply)
+                if flag == EXACT:
+                    return score
+                if flag == LOWERBOUND and score >= beta:
+                    return score
+                if flag == UPPERBOUND and score <= alpha:
+                    return score
+
+        # Selective search only applies to null-window nodes outside of check.
+        pv_node = beta - alpha > 1
+        in_check = position.in_check()
+        static_eval = self.evaluate(position)
+        selective = not pv_node and not in_check and abs(beta) < self.MATE_SCORE - self.MAX_DEPTH
+
+        # Reverse futility pruning: close to the leaves a position this far above
+        # beta is not going to drop below it.
+        if self.futility_pruning and selective and depth < len(self.FUTILITY_MARGINS) \
+                and static_eval - self.FUTILITY_MARGINS[depth] >= beta:
+            return static_eval
+
+        # Null-move pruning, skipped without pieces (zugzwang) and after another null.
+        us = position.turn
+        if self.null_move and selective and allow_null and depth >= 3 and static_eval >= beta \
+                and position.occupied_co[us] & ~(position.bitboards[chess.PAWN | us << 3] |
+                                                 position.bitboards[chess.KING | us << 3]):
+            reduction = self.NULL_MOVE_REDUCTION + (1 if depth > 6 else 0)
+            position.make_null()
+            score = -self.alphabeta(position, depth - 1 - reduction, -beta, -beta + 1, ply + 1, False)
+            position.unmake_null()
+            if score >= beta:
+                self.stats.null_cutoffs += 1
+                return beta
+
+        # Futility pruning: quiet moves cannot lift a hopeless score up to alpha.
+        futile = self.futility_pruning and selective and depth < len(self.FUTILITY_MARGINS) \
+            and static_eval + self.FUTILITY_MARGINS[depth] <= alpha
+
+        alpha_orig = alpha
+        best_score = -self.INFINITE
+        best_move = None
+        index = -1
+        for move in self.move_orderer.order(position, hash_move, ply):
+            if not position.make(move):
+                continue
+            index += 1
+            quiet = not in_check and not move & (CAPTURE_FLAG | 0x7000)
+            if quiet and index > 0 and (futile or (self.late_move_reductions and index >= 3 and depth >= 3)):
+                quiet = not position.in_check()
+            if futile and quiet and index > 0:
+                self.stats.futility_prunes += 1
+                position.unmake()
+                continue
+            if index == 0:
+                score = -self.alphabeta(position, depth - 1, -beta, -alpha, ply + 1)
+            else:
+                # Late move reductions: quiet moves ordered late get a shallower
+                # null-window search first and are only searched fully if they beat alpha.
+                reduction = 0
+                if self.late_move_reductions and quiet and index >= 3 and depth >= 3:
+                    reduction = 2 if index >= 6 and depth >= 6 else 1
+                score = -self.alphabeta(position, depth - 1 - reduction, -alpha - 1, -alpha, ply + 1)
+                if reduction and score > alpha:
+                    self.stats.lmr_researches += 1
+                    score = -self.alphabeta(position, depth - 1, -alpha - 1, -alpha, ply + 1)
+                if alpha < score < beta:
+                    score = -self.alphabeta(position, depth - 1, -beta, -alpha, ply + 1)
+            position.unmake()
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        self.move_orderer.record_cutoff(position, move, depth, ply, index)
+                        break
+
+        if index < 0:
+            # No legal move: mated here, ply moves from the root, or stalemate.
+            return -self.MATE_SCORE + ply if in_check else 0
+
+        if best_score <= alpha_orig:
+            flag = UPPERBOUND
+        elif best_score >= beta:
+            flag = LOWERBOUND
+        else:
+            flag = EXACT
+        self.transposition_table.store(key, depth, flag, self.score_to_table(best_score, ply), best_move)
+        return best_score
+
+    def score_to_table(self, score, ply):
+        # Mate and tablebase scores count plies from the root; the table stores them
+        # counted from the node so they stay right wherever the position recurs.
+        if score >= self.TABLEBASE_WIN - self.MAX_DEPTH:
+            return score + ply
+        if score <= -self.TABLEBASE_WIN + self.MAX_DEPTH:
+            return score - ply
+        return score
+
+    def score_from_table(self, score, ply):
+        if score >= self.TABLEBASE_WIN - self.MAX_DEPTH:
+            return score - ply
+        if score <= -self.TABLEBASE_WIN + self.MAX_DEPTH:
+            return score + ply
+        return score
+
+    def search_root(self, position, depth, root_moves, alpha, beta):
+        best_move = None
+        best_score = -self.INFINITE
+
+        for index, move in enumerate(root_moves):
+            position.make(move)
+            if index == 0:
+                score = -self.alphabeta(position, depth, -beta, -alpha)
+            else:
+                score = -self.alphabeta(position, depth, -alpha - 1, -alpha)
+                if alpha < score < beta:
+                    score = -self.alphabeta(position, depth, -beta, -alpha)
+            position.unmake()
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    self.iteration_best = move
+                    if alpha >= beta:
+                        break
+
+        return best_move, best_score
+
+    def probe_cache(self, key):
+        # Only PV nodes go to the on-disk cache; a hit is copied into the
+        # transposition table so the rest of the search finds it in memory.
+        row = self.analysis_cache.probe(key)
+        if row is None:
+            return None
+        depth, flag, score, move = row
+        self.transposition_table.store(key, depth, flag, score, move)
+        return key, depth, flag, score, move, None
+
+    def store_cache(self, position, depth, score, best_move, include_root):
+        # After a completed iteration: the root result plus the table entries
+        # along the principal variation. A search restricted to some root moves
+        # only knows the best of those, so its root result is left out.
+        entries = [(position.key, depth, EXACT, score, best_move)] if include_root else []
+        made = 0
+        move = best_move
+        while move is not None and made < depth and position.is_legal(move):
+            position.make(move)
+            made += 1
+            entry = self.transposition_table.probe(position.key)
+            if entry is None:
+                break
+            entries.append(entry[:5])
+            move = entry[4]
+        for _ in range(made):
+            position.unmake()
+        self.analysis_cache.store_many(entries)
+
+    def principal_variation(self, position, first_move, max_length):
+        pv = [first_move]
+        position.make(first_move)
+        while len(pv) < max_length:
+            entry = self.transposition_table.probe(position.key)
+            if entry is None and self.analysis_cache is not None:
+                entry = self.probe_cache(position.key)
+            if entry is None or entry[4] is None or not position.is_legal(entry[4]):
+                break
+            pv.append(entry[4])
+            position.make(entry[4])
+        for _ in pv:
+            position.unmake()
+        return [to_chess_move(move) for move in pv]
+
+    def worker_settings(self):
+        return (self.transposition_table.size, self.null_move, self.late_move_reductions,
+                self.futility_pruning, self.tablebase_path, self.cache_path, self.game_number)
+
+    def start_workers(self, thread=None):
+        # Starts the root-parallel pool and returns once every process is up, so a
+        # front-end can pay for it before the clock runs (UCI does on isready).
+        # self.executor is only set when the pool is ready. thread is the
+        # background thread a search started for this; close() cancels it.
+        with self.pool_lock:
+            if self.workers <= 1 or self.executor is not None:
+                return
+            if thread is not None and thread is not self.pool_thread:
+                return
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            # Spawned, not forked: a fork taken while another thread blocks on
+            # stdin (the UCI loop) deadlocks when the child closes its stdin.
+            context = multiprocessing.get_context('spawn')
+            self.stop_event = context.Event()
+            self.info_queue = context.Queue()
+            started = context.Semaphore(0)
+            executor = ProcessPoolExecutor(self.workers, mp_context=context, initializer=init_search_worker,
+                                           initargs=(self.stop_event, self.info_queue, started))
+            # The pool spawns a process per task while none is idle, so one task
+            # per worker starts them all.
+            settings = self.worker_settings()
+            for future in [executor.submit(prepare_worker, settings) for _ in range(self.workers)]:
+                future.result()
+            for _ in range(self.workers):
+                started.acquire()
+            self.executor = executor
+
+    def start_workers_in_background(self):
+        if self.pool_thread is None:
+            thread = threading.Thread(target=lambda: self.start_workers(thread), daemon=True)
+            self.pool_thread = thread
+            thread.start()
+
+    def parallel_search(self, board, movetime_ms, nodes, info, root_moves):
+        # Root-parallel search: the root moves are dealt round-robin to the pool and
+        # every process runs its own iterative deepening over its share. The answer
+        # is the best move at the deepest iteration that all processes completed,
+        # and each depth is reported as soon as every process has completed it.
+        from concurrent.futures import wait
+        # The processes get an absolute deadline, so the time a task waits to be
+        # picked up is charged to the search.
+        start = time.monotonic()
+        deadline = start + movetime_ms / 1000.0 if movetime_ms is not None else None
+        self.stop_event.clear()
+        if self.search_id <= self.stopped_search_id:
+            self.stop_event.set()
+        chunks = [root_moves[index::self.workers] for index in range(self.workers)]
+        chunks = [chunk for chunk in chunks if chunk]
+        chunk_nodes = max(nodes // len(chunks), 1) if nodes is not None else None
+        settings = self.worker_settings()
+        # Queue messages are tagged with the search and the chunk, so leftovers
+        # from an earlier search are ignored.
+        futures = [self.executor.submit(search_in_worker, board.copy(), chunk, settings, self.max_depth,
+                                        deadline, chunk_nodes, (self.search_id, index))
+                   for index, chunk in enumerate(chunks)]
+        progress = [{} for _ in chunks]
+        reported = 0
+        pending = set(futures)
+        while pending:
+            _, pending = wait(pending, timeout=self.PROGRESS_INTERVAL)
+            reported = self.report_progress(info, progress, reported, start)
+        results = [future.result() for future in futures]
+        self.nodes = sum(worker_nodes for _, worker_nodes in results)
+        finished = [iterations for iterations, _ in results if iterations]
+        if not finished:
+            return SearchResult(root_moves[0], 0, 0, [root_moves[0]], self.nodes)
+        depth = min(iterations[-1]['depth'] for iterations in finished)
+        best = max((next(data for data in iterations if data['depth'] == depth) for iterations in finished),
+                   key=lambda data: data['score'])
+        if depth > reported:
+            self.report(info, dict(best, nodes=self.nodes, time=time.monotonic() - start))
+        return SearchResult(best['pv'][0], best['score'], depth, best['pv'], self.nodes)
+
+    def report_progress(self, info, progress, reported, start):
+        # progress[chunk][depth] holds the iterations received so far. Reports
+        # every depth above reported that all chunks have completed and returns
+        # the deepest one.
+        while True:
+            try:
+                (search_id, index), data = self.info_queue.get_nowait()
+            except queue.Empty:
+                break
+            if search_id == self.search_id:
+                progress[index][data['depth']] = data
+        while all(reported + 1 in chunk for chunk in progress):
+            reported += 1
+            best = max((chunk[reported] for chunk in progress), key=lambda data: data['score'])
+            nodes = sum(max(chunk.values(), key=lambda data: data['depth'])['nodes'] for chunk in progress)
+            self.report(info, dict(best, nodes=nodes, time=time.monotonic() - start))
+        return reported
+
+    def search(self, board, movetime_ms=None, nodes=None, info=None, root_moves=None, ponder=False,
+               search_id=None):
+        # Without a budget this is a fixed-depth search to max_depth. With movetime_ms
+        # and/or nodes it deepens one ply at a time until the budget runs out and
+        # returns the result of the deepest iteration that finished. info, if given,
+        # is called with a dict describing each completed iteration. root_moves
+        # restricts the search to those moves. The board itself is never modified;
+        # the search runs on a Position built from it. A position found in the
+        # opening book is answered from the book without searching at all, and so
+        # is an endgame the Syzygy tables cover. With ponder the search deepens
+        # without a budget until stop() or ponderhit(). search_id is an id from
+        # request_search(), taken when the search was queued. self.stats holds
+        # the counters of the latest search.
+        self.search_id = search_id if search_id is not None else self.request_search()
+        self.stats.reset()
+        move = self.book_move(board, root_moves)
+        if move is not None:
+            result = SearchResult(move, 0, 0, [move], 0)
+            self.report(info, {'depth': 0, 'score': 0, 'nodes': 0, 'time': 0.0, 'pv': [move], 'book': True})
+            return result
+        result = self.tablebase_move(board, root_moves)
+        if result is not None:
+            self.report(info, {'depth': 0, 'score': result.score, 'nodes': 0, 'time': 0.0, 'pv': result.pv,
+                               'tablebase': True})
+            return result
+
+        # A ponder search stays in this process so ponderhit() can give it a deadline.
+        # Until the pool is up, searches run here too rather than wait for it.
+        if self.workers > 1 and not ponder:
+            if self.executor is None:
+                self.start_workers_in_background()
+            else:
+                if root_moves is None:
+                    root_moves = list(board.legal_moves)
+                if len(root_moves) > 1:
+                    return self.parallel_search(board, movetime_ms, nodes, info, root_moves)
+
+        start = time.monotonic()
+        timed = movetime_ms is not None or nodes is not None or ponder
+        self.search_start = start
+        self.ponder_hit = False
+        self.nodes = 0
+        self.deadline = start + movetime_ms / 1000.0 if movetime_ms is not None else None
+        self.node_limit = nodes
+        self.next_check = 0
+        self.transposition_table.new_search()
+        self.move_orderer.new_search()
+
+        position = Position(board, self.SQUARE_VALUES)
+        legal_moves = position.legal_moves()
+        restricted = root_moves is not None
+        if root_moves is None:
+            entry = self.transposition_table.probe(position.key)
+            ordered = self.move_orderer.order(position, entry[4] if entry is not None else None, 0)
+            root_moves = [move for move in ordered if move in legal_moves]
+        else:
+            root_moves = [position.move_from_chess(move) for move in root_moves]
+            root_moves = [move for move in root_moves if move in legal_moves]
+        if not root_moves:
+            return SearchResult(None, 0, 0, [], 0)
+
+        best_move, best_score, best_depth, pv = root_moves[0], 0, 0, [to_chess_move(root_moves[0])]
+        max_depth = self.MAX_DEPTH if timed else self.max_depth
+
+        # A fixed-depth search already answered by the on-disk cache is not repeated.
+        if self.analysis_cache is not None:
+            row = self.analysis_cache.probe(position.key)
+            if row is not None:
+                depth, flag, score, move = row
+                self.transposition_table.store(position.key, depth, flag, score, move)
+                if not timed and not restricted and flag == EXACT and depth >= max_depth + 1 \
+                        and move in root_moves:
+                    pv = self.principal_variation(position, move, depth)
+                    self.report(info, {'depth': depth, 'score': score, 'nodes': 0,
+                                       'time': time.monotonic() - start, 'pv': pv})
+                    return SearchResult(to_chess_move(move), score, depth, pv, 0)
+
+        for depth in range(max_depth + 1):
+            self.iteration_best = None
+            # Aspiration window around the previous score, widened on every failure.
+            window = self.ASPIRATION_WINDOW
+            if depth > 0:
+                alpha, beta = best_score - window, best_score + window
+            else:
+                alpha, beta = -self.INFINITE, self.INFINITE
+            try:
+                while True:
+                    move, score = self.search_root(position, depth, root_moves, alpha, beta)
+                    if score <= alpha and alpha > -self.INFINITE:
+                        alpha = max(score - window, -self.INFINITE)
+                    elif score >= beta and beta < self.INFINITE:
+                        beta = min(score + window, self.INFINITE)
+                    else:
+                        break
+                    window *= 2
+            except SearchTimeout:
+                position.unwind()
+                # The previous best move is searched first, so a move that beat it
+                # before the budget ran out is at least as good as the old choice.
+                if self.iteration_best is not None and self.iteration_best != best_move:
+                    best_move = self.iteration_best
+                    pv = [to_chess_move(best_move)]
+                break
+            best_move, best_score, best_depth = move, score, depth + 1
+            pv = self.principal_variation(position, best_move, depth + 1)
+            if self.analysis_cache is not None:
+                self.store_cache(position, best_depth, best_score, best_move, not restricted)
+            elapsed = time.monotonic() - start
+            data = {
+                'depth': best_depth,
+                'seldepth': self.stats.seldepth,
+                'score': best_score,
+                'nodes': self.nodes,
+                'nps': int(self.nodes / elapsed) if elapsed > 0 else 0,
+                'hashfull': self.transposition_table.hashfull(),
+                'time': elapsed,
+                'pv': pv,
+            }
+            self.stats.iterations.append(data)
+            self.report(info, data)
+            # Search the principal variation first on the next iteration.
+            root_moves.remove(best_move)
+            root_moves.insert(0, best_move)
+            if self.deadline is not None and time.monotonic() - start > (self.deadline - start) / 2:
+                break
+            if self.ponder_hit and best_depth >= self.PONDERHIT_MIN_DEPTH:
+                break
+
+        self.deadline = None
+        self.node_limit = None
+        return SearchResult(to_chess_move(best_move), best_score, best_depth, pv, self.nodes)
+
+    def ponderhit(self, movetime_ms):
+        # The expected move was played, so the ponder search becomes the real one.
+        # One that is already PONDERHIT_MIN_DEPTH deep answers within PONDERHIT_MS.
+        # A shallower one answers when it gets that deep, or when movetime_ms
+        # counted from the start of pondering runs out.
+        deadline = self.search_start + movetime_ms / 1000.0
+        if len(self.stats.iterations) >= self.PONDERHIT_MIN_DEPTH:
+            deadline = min(deadline, time.monotonic() + self.PONDERHIT_MS / 1000.0)
+        self.ponder_hit = True
+        self.deadline = deadline
+
+    def make_move(self, board, movetime_ms=None, nodes=None, info=None, root_moves=None):
+        return self.search(board, movetime_ms, nodes, info, root_moves).move
@@ -0,0 +1,14 @@
+# EPD files, one position per line with optional operations such as id or bm.
+# Shared by the tools that read position suites (analyse, bench, match).
+import chess
+
+def read_epd(path):
+    # Yields (line number, board, operations) for every position; blank lines and
+    # lines starting with # are skipped.
+    with open(path) as epd_file:
+        for number, line in enumerate(epd_file, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            board, operations = chess.Board.from_epd(line)
+            yield number, board, operations
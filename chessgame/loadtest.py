@@ -0,0 +1,136 @@
+# Load test for the game server: keeps a number of games running at once, each
+# answering the engine with random legal moves, and measures how long every
+# engine reply takes. The concurrency is doubled level by level until the 95th
+# percentile reply time exceeds the target, e.g.
+#   python -m chessgame.loadtest --workers 2 --movetime 100 --target-ms 250
+# starts a server in this process; --connect host:port tests a running one.
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import chess
+from .server import GameServer, percentiles
+
+async def request(reader, writer, message):
+    writer.write((json.dumps(message) + '\n').encode())
+    await writer.drain()
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError('the server closed the connection')
+    return json.loads(line)
+
+async def play_games(host, port, movetime_ms, deadline, rng, latencies, counters):
+    # One connection playing game after game as White until the deadline.
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.monotonic() < deadline:
+            response = await request(reader, writer, {'cmd': 'new', 'color': 'white', 'movetime': movetime_ms})
+            if 'error' in response:
+                counters['errors'] += 1
+                await asyncio.sleep(movetime_ms / 1000)
+                continue
+            game_id = response['game']
+            board = chess.Board()
+            counters['games'] += 1
+            while time.monotonic() < deadline and not board.is_game_over(claim_draw=True):
+                move = rng.choice(list(board.legal_moves))
+                board.push(move)
+                start = time.monotonic()
+                response = await request(reader, writer, {'cmd': 'move', 'game': game_id, 'move': move.uci()})
+                if 'error' in response:
+                    counters['errors'] += 1
+                    break
+                if response.get('engine_move'):
+                    latencies.append((time.monotonic() - start) * 1000)
+                    board.push_uci(response['engine_move'])
+            await request(reader, writer, {'cmd': 'close', 'game': game_id})
+    finally:
+        writer.close()
+
+async def run_level(host, port, concurrency, duration, movetime_ms, seed):
+    latencies = []
+    counters = {'games': 0, 'errors': 0}
+    deadline = time.monotonic() + duration
+    start = time.monotonic()
+    await asyncio.gather(*(play_games(host, port, movetime_ms, deadline, random.Random(seed + index),
+                                      latencies, counters)
+                           for index in range(concurrency)))
+    elapsed = time.monotonic() - start
+    return {
+        'concurrency': concurrency,
+        'moves': len(latencies),
+        'moves_per_second': round(len(latencies) / elapsed, 2),
+        'games': counters['games'],
+        'errors': counters['errors'],
+        'latency_ms': percentiles(latencies),
+    }
+
+async def load_test(host, port, movetime_ms, target_ms, duration, max_concurrency, seed, server=None):
+    # Returns the per-level results and the highest concurrency whose p95 reply
+    # time stayed within the target.
+    levels = []
+    sustained = 0
+    concurrency = 1
+    while concurrency <= max_concurrency:
+        level = await run_level(host, port, concurrency, duration, movetime_ms, seed)
+        if server is not None:
+            level['server'] = server.metrics_snapshot()
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+            level['server'] = await request(reader, writer, {'cmd': 'metrics'})
+            writer.close()
+        levels.append(level)
+        latency = level['latency_ms']
+        print(f"{concurrency} games: {level['moves_per_second']} moves/s, "
+              f"p95 {latency['p95'] if latency else '-'} ms", file=sys.stderr)
+        if latency is None or latency['p95'] > target_ms or level['errors']:
+            break
+        sustained = concurrency
+        concurrency *= 2
+    workers = levels[-1]['server'].get('workers', 1) if levels else 1
+    return {
+        'movetime_ms': movetime_ms,
+        'target_p95_ms': target_ms,
+        'workers': workers,
+        'sustained_games': sustained,
+        'games_per_core': round(sustained / workers, 2),
+        'levels': levels,
+    }
+
+async def run(args):
+    server = None
+    if args.connect:
+        host, _, port = args.connect.rpartition(':')
+        port = int(port)
+    else:
+        server = GameServer(args.workers, args.movetime)
+        host, port = await server.start('127.0.0.1', 0)
+    try:
+        return await load_test(host, port, args.movetime, args.target_ms, args.duration, args.max_games,
+                               args.seed, server)
+    finally:
+        if server is not None:
+            await server.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Find how many concurrent games the server sustains.')
+    parser.add_argument('--connect', help='host:port of a running server (default: start one here)')
+    parser.add_argument('--workers', type=int, default=None, help='engine processes of the local server')
+    parser.add_argument('--movetime', type=int, default=100, help='engine milliseconds per move')
+    parser.add_argument('--target-ms', type=float, default=250, help='p95 engine reply time to stay within')
+    parser.add_argument('--duration', type=float, default=10, help='seconds per concurrency level')
+    parser.add_argument('--max-games', type=int, default=256, help='highest concurrency tried')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='JSON report file')
+    args = parser.parse_args()
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(text + '\n')
+    print(text)
+
+if __name__ == '__main__':
+    main()
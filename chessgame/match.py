@@ -0,0 +1,359 @@
+# Self-play matches between two engine configurations, played in parallel pool
+# processes, e.g.
+#   python -m chessgame.match --engine max_depth=5 --engine max_depth=5,null_move=False \
+#       --games 1000 --movetime 100 --openings openings.epd --pgn games.pgn --output match.json
+# Every opening is played twice with colours swapped. Results are reported for the
+# first engine against the second as an Elo difference, and with --sprt the match
+# stops as soon as the sequential probability ratio test accepts H0 (elo0) or H1 (elo1).
+import argparse
+import ast
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import chess
+import chess.pgn
+from .engine import ChessEngine
+from .epd import read_epd
+
+# Short, balanced lines used when no opening suite is given.
+DEFAULT_OPENINGS = [
+    '',
+    'e4 e5 Nf3 Nc6 Bb5 a6',
+    'e4 e5 Nf3 Nc6 Bc4 Bc5',
+    'e4 c5 Nf3 d6 d4 cxd4 Nxd4 Nf6 Nc3',
+    'e4 c5 Nc3 Nc6 g3 g6',
+    'e4 e6 d4 d5 Nc3 Nf6',
+    'e4 c6 d4 d5 e5 Bf5',
+    'd4 d5 c4 e6 Nc3 Nf6',
+    'd4 d5 c4 c6 Nf3 Nf6',
+    'd4 Nf6 c4 g6 Nc3 Bg7 e4 d6',
+    'd4 Nf6 c4 e6 Nc3 Bb4',
+    'c4 e5 Nc3 Nf6 Nf3 Nc6',
+    'Nf3 d5 g3 Nf6 Bg2 c6',
+]
+
+worker_engines = None
+worker_names = None
+
+def parse_engine(text):
+    # 'max_depth=5,null_move=False,name=nonull' -> (name, ChessEngine keyword arguments).
+    options = {}
+    for item in filter(None, (part.strip() for part in text.split(','))):
+        key, _, value = item.partition('=')
+        try:
+            options[key.strip()] = ast.literal_eval(value.strip())
+        except (ValueError, SyntaxError):
+            options[key.strip()] = value.strip()
+    options.setdefault('max_depth', 4)
+    name = str(options.pop('name', text or 'default'))
+    return name, options
+
+def read_openings(path, plies=8):
+    # (starting fen, [uci moves]) for every line of an EPD file or the first plies
+    # of every game of a PGN file.
+    openings = []
+    if path.lower().endswith('.pgn'):
+        with open(path) as pgn_file:
+            while True:
+                game = chess.pgn.read_game(pgn_file)
+                if game is None:
+                    break
+                moves = [move.uci() for move in list(game.mainline_moves())[:plies]]
+                openings.append((game.board().fen(), moves))
+    else:
+        openings.extend((board.fen(), []) for _, board, _ in read_epd(path))
+    return openings
+
+def default_openings():
+    openings = []
+    for line in DEFAULT_OPENINGS:
+        board = chess.Board()
+        moves = [board.push_san(san).uci() for san in line.split()]
+        openings.append((chess.STARTING_FEN, moves))
+    return openings
+
+def init_worker(configs):
+    global worker_engines, worker_names
+    worker_names = [name for name, _ in configs]
+    worker_engines = [ChessEngine(**options) for _, options in configs]
+
+def play_game(index, fen, opening_moves, first_is_white, limits, adjudication):
+    # Runs in a pool process. Returns the result from White's point of view plus
+    # the game as PGN and per-engine search statistics.
+    movetime_ms, nodes = limits
+    resign_score, resign_moves, draw_score, draw_moves, draw_start, max_plies = adjudication
+    engines = worker_engines if first_is_white else worker_engines[::-1]
+    names = worker_names if first_is_white else worker_names[::-1]
+    for engine in engines:
+        engine.transposition_table.clear()
+    board = chess.Board(fen)
+    for move in opening_moves:
+        board.push_uci(move)
+    game = chess.pgn.Game.from_board(board)
+    game.headers.update({'Event': 'chessgame.match', 'Round': str(index + 1), 'White': names[0], 'Black': names[1]})
+    node = game.end()
+    stats = {chess.WHITE: [0, 0, 0.0, 0], chess.BLACK: [0, 0, 0.0, 0]}  # moves, nodes, time, depth
+    resign_count = draw_count = 0
+    result = termination = None
+    while result is None:
+        outcome = board.outcome(claim_draw=True)
+        if outcome is not None:
+            result, termination = outcome.result(), outcome.termination.name.lower()
+            break
+        if board.ply() >= max_plies:
+            result, termination = '1/2-1/2', 'max_plies'
+            break
+        color = board.turn
+        start = time.perf_counter()
+        search = engines[0 if color == chess.WHITE else 1].search(board, movetime_ms, nodes)
+        elapsed = time.perf_counter() - start
+        if search.move is None:
+            result, termination = ('0-1' if color == chess.WHITE else '1-0'), 'no_move'
+            break
+        moves, total_nodes, total_time, total_depth = stats[color]
+        stats[color] = [moves + 1, total_nodes + search.nodes, total_time + elapsed, total_depth + search.depth]
+        node = node.add_variation(search.move, comment=f'{search.score / 100:+.2f}/{search.depth} {elapsed:.2f}s')
+        board.push(search.move)
+
+        # Adjudication counts consecutive plies, so both engines must agree.
+        white_score = search.score if color == chess.WHITE else -search.score
+        if resign_score is not None and abs(white_score) >= resign_score:
+            sign = 1 if white_score > 0 else -1
+            resign_count = resign_count + sign if resign_count * sign >= 0 else sign
+        else:
+            resign_count = 0
+        if abs(resign_count) >= 2 * resign_moves:
+            result, termination = ('1-0' if resign_count > 0 else '0-1'), 'adjudicated_resign'
+        if draw_score is not None and board.ply() >= 2 * draw_start and abs(white_score) <= draw_score:
+            draw_count += 1
+        else:
+            draw_count = 0
+        if result is None and draw_count >= 2 * draw_moves:
+            result, termination = '1/2-1/2', 'adjudicated_draw'
+    game.headers['Result'] = result
+    game.headers['Termination'] = termination
+    return {
+        'index': index,
+        'first_is_white': first_is_white,
+        'result': result,
+        'termination': termination,
+        'plies': board.ply(),
+        'white': names[0],
+        'black': names[1],
+        'pgn': str(game),
+        'stats': {'white': stats[chess.WHITE], 'black': stats[chess.BLACK]},
+    }
+
+def expected_score(elo):
+    return 1 / (1 + 10 ** (-elo / 400))
+
+def elo_difference(wins, draws, losses):
+    # Elo difference and its 95% error margin from the first engine's results.
+    games = wins + draws + losses
+    if games == 0:
+        return 0.0, None
+    score = (wins + draws / 2) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    if score in (0, 1):
+        return (math.inf if score else -math.inf), None
+    elo = -400 * math.log10(1 / score - 1)
+    margin = 1.96 * math.sqrt(variance / games)
+    low = min(max(score - margin, 1e-6), 1 - 1e-6)
+    high = min(max(score + margin, 1e-6), 1 - 1e-6)
+    return elo, (-400 * math.log10(1 / high - 1) - -400 * math.log10(1 / low - 1)) / 2
+
+def sprt_llr(wins, draws, losses, elo0, elo1):
+    # Log-likelihood ratio of H1 (elo1) against H0 (elo0), using the normal
+    # approximation to the trinomial win/draw/loss distribution.
+    if wins + draws + losses == 0:
+        return 0.0
+    if not (wins and draws and losses):
+        # A one-sided record has no variance; smooth it with half a game of each result.
+        wins, draws, losses = wins + 0.5, draws + 0.5, losses + 0.5
+    games = wins + draws + losses
+    score = (wins + draws / 2) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    s0, s1 = expected_score(elo0), expected_score(elo1)
+    return games * (s1 - s0) * (2 * score - s0 - s1) / (2 * variance)
+
+def sprt_bounds(alpha, beta):
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+class MatchResult:
+    # Running totals from the first engine's point of view.
+    def __init__(self, names, sprt=None):
+        self.names = names
+        self.sprt = sprt  # (elo0, elo1, alpha, beta) or None
+        self.wins = self.draws = self.losses = 0
+        self.terminations = {}
+        self.engine_stats = [[0, 0, 0.0, 0], [0, 0, 0.0, 0]]
+        self.sprt_result = None
+
+    def add(self, game):
+        first = 1 if game['first_is_white'] else -1
+        white = {'1-0': 1, '0-1': -1, '1/2-1/2': 0}[game['result']]
+        if white * first > 0:
+            self.wins += 1
+        elif white * first < 0:
+            self.losses += 1
+        else:
+            self.draws += 1
+        self.terminations[game['termination']] = self.terminations.get(game['termination'], 0) + 1
+        colors = ('white', 'black') if game['first_is_white'] else ('black', 'white')
+        for engine_stats, color in zip(self.engine_stats, colors):
+            for field, value in enumerate(game['stats'][color]):
+                engine_stats[field] += value
+        if self.sprt is not None and self.sprt_result is None:
+            lower, upper = sprt_bounds(*self.sprt[2:])
+            llr = self.llr()
+            if llr >= upper:
+                self.sprt_result = 'H1'
+            elif llr <= lower:
+                self.sprt_result = 'H0'
+
+    @property
+    def games(self):
+        return self.wins + self.draws + self.losses
+
+    def llr(self):
+        return sprt_llr(self.wins, self.draws, self.losses, *self.sprt[:2]) if self.sprt else None
+
+    def summary(self):
+        elo, margin = elo_difference(self.wins, self.draws, self.losses)
+        engines = []
+        for name, (moves, nodes, seconds, depth) in zip(self.names, self.engine_stats):
+            engines.append({
+                'name': name,
+                'moves': moves,
+                'avg_nodes': round(nodes / moves) if moves else 0,
+                'avg_time': round(seconds / moves, 4) if moves else 0,
+                'avg_depth': round(depth / moves, 2) if moves else 0,
+                'nps': int(nodes / seconds) if seconds > 0 else 0,
+            })
+        summary = {
+            'games': self.games,
+            'wins': self.wins,
+            'draws': self.draws,
+            'losses': self.losses,
+            'score': round((self.wins + self.draws / 2) / self.games, 4) if self.games else None,
+            'elo': (round(elo, 1) or 0.0) if math.isfinite(elo) else None,
+            'elo_margin': round(margin, 1) if margin is not None else None,
+            'terminations': self.terminations,
+            'engines': engines,
+        }
+        if self.sprt is not None:
+            lower, upper = sprt_bounds(*self.sprt[2:])
+            summary['sprt'] = {'elo0': self.sprt[0], 'elo1': self.sprt[1], 'alpha': self.sprt[2],
+                               'beta': self.sprt[3], 'llr': round(self.llr(), 3),
+                               'bounds': [round(lower, 3), round(upper, 3)], 'result': self.sprt_result}
+        return summary
+
+def run_match(configs, openings, games, movetime_ms=None, nodes=None, workers=None, adjudication=None,
+              sprt=None, max_pending=None):
+    # Yields (game, MatchResult) as games complete. Openings are used in order and
+    # each is played with both colour assignments. Stops early once SPRT decides.
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 2
+    adjudication = adjudication or (1000, 3, 10, 8, 40, 400)
+    match = MatchResult([name for name, _ in configs], sprt)
+    tasks = ((index, *openings[(index // 2) % len(openings)], index % 2 == 0)
+             for index in range(games))
+    pending = set()
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(configs,)) as executor:
+        exhausted = False
+        while True:
+            while not exhausted and match.sprt_result is None and len(pending) < max_pending:
+                task = next(tasks, None)
+                if task is None:
+                    exhausted = True
+                    break
+                pending.add(executor.submit(play_game, *task, (movetime_ms, nodes), adjudication))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                game = future.result()
+                match.add(game)
+                yield game, match
+            if match.sprt_result is not None:
+                for future in pending:
+                    future.cancel()
+                # Games already running are finished but not counted.
+                pending = set()
+
+def main():
+    parser = argparse.ArgumentParser(description='Play a self-play match between two engine configurations.')
+    parser.add_argument('--engine', action='append', required=True,
+                        help='ChessEngine options as key=value,...; given twice, first engine first')
+    parser.add_argument('--games', type=int, default=100, help='maximum number of games')
+    parser.add_argument('--movetime', type=int, help='milliseconds per move')
+    parser.add_argument('--nodes', type=int, help='nodes per move')
+    parser.add_argument('--openings', help='EPD or PGN opening suite (default: built-in lines)')
+    parser.add_argument('--opening-plies', type=int, default=8, help='plies taken from each PGN game')
+    parser.add_argument('--workers', type=int, default=None, help='game processes (default: CPU count)')
+    parser.add_argument('--pgn', help='PGN file the games are appended to')
+    parser.add_argument('--output', help='JSON summary file')
+    parser.add_argument('--resign-score', type=int, default=1000, help='centipawns for resign adjudication')
+    parser.add_argument('--resign-moves', type=int, default=3, help='moves per side beyond the resign score')
+    parser.add_argument('--draw-score', type=int, default=10, help='centipawns for draw adjudication')
+    parser.add_argument('--draw-moves', type=int, default=8, help='moves per side within the draw score')
+    parser.add_argument('--draw-start', type=int, default=40, help='first move number draws are adjudicated')
+    parser.add_argument('--max-moves', type=int, default=200, help='moves per side before a game is drawn')
+    parser.add_argument('--no-adjudication', action='store_true', help='play every game to its end')
+    parser.add_argument('--sprt', nargs=2, type=float, metavar=('ELO0', 'ELO1'), help='stop early by SPRT')
+    parser.add_argument('--alpha', type=float, default=0.05, help='SPRT false positive rate')
+    parser.add_argument('--beta', type=float, default=0.05, help='SPRT false negative rate')
+    args = parser.parse_args()
+    if len(args.engine) != 2:
+        parser.error('--engine must be given exactly twice')
+
+    configs = [parse_engine(text) for text in args.engine]
+    if configs[0][0] == configs[1][0]:
+        configs = [(f'{name}#{number}', options) for number, (name, options) in enumerate(configs, 1)]
+    openings = read_openings(args.openings, args.opening_plies) if args.openings else default_openings()
+    if not openings:
+        parser.error('the opening suite is empty')
+    if args.no_adjudication:
+        adjudication = (None, 0, None, 0, 0, 2 * args.max_moves)
+    else:
+        adjudication = (args.resign_score, args.resign_moves, args.draw_score, args.draw_moves,
+                        args.draw_start, 2 * args.max_moves)
+    sprt = (args.sprt[0], args.sprt[1], args.alpha, args.beta) if args.sprt else None
+
+    pgn_file = open(args.pgn, 'a') if args.pgn else None
+    start = time.monotonic()
+    match = None
+    try:
+        for game, match in run_match(configs, openings, args.games, args.movetime, args.nodes, args.workers,
+                                     adjudication, sprt):
+            if pgn_file is not None:
+                pgn_file.write(game['pgn'] + '\n\n')
+                pgn_file.flush()
+            elo, margin = elo_difference(match.wins, match.draws, match.losses)
+            line = (f"Game {game['index'] + 1}: {game['white']} - {game['black']} {game['result']} ({game['termination']}); "
+                    f"+{match.wins} ={match.draws} -{match.losses}, Elo {elo:+.1f}")
+            if margin is not None:
+                line += f' +/- {margin:.1f}'
+            if sprt is not None:
+                line += f', LLR {match.llr():.2f}'
+            print(line, file=sys.stderr)
+    finally:
+        if pgn_file is not None:
+            pgn_file.close()
+
+    summary = match.summary() if match is not None else MatchResult([name for name, _ in configs], sprt).summary()
+    summary['time'] = round(time.monotonic() - start, 2)
+    summary['settings'] = {'movetime': args.movetime, 'nodes': args.nodes, 'openings': len(openings),
+                           'adjudication': None if args.no_adjudication else adjudication,
+                           'engines': {name: options for name, options in configs}}
+    report = json.dumps(summary, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(report + '\n')
+    print(report)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+# Piece images for the Qt boards. The twelve images are loaded once, from the
+# images directory next to this module, and shared by every button and view.
+import os
+import chess
+from PyQt5.QtGui import QIcon, QPixmap
+
+IMAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'images')
+
+icon_cache = {}
+pixmap_cache = {}
+
+def piece_image_path(piece):
+    color = 'w' if piece.color == chess.WHITE else 'b'
+    return os.path.join(IMAGE_DIR, f"{color}_{piece.symbol().lower()}.png")
+
+def load_piece_icons():
+    # Needs a QApplication to exist, so it runs on first use rather than at import.
+    for color in chess.COLORS:
+        for piece_type in chess.PIECE_TYPES:
+            piece = chess.Piece(piece_type, color)
+            image_path = piece_image_path(piece)
+            pixmap = QPixmap(image_path)
+            if pixmap.isNull():
+                print(f"Image not loaded: {image_path}")
+                icon_cache[piece] = None
+                pixmap_cache[piece] = None
+            else:
+                icon_cache[piece] = (QIcon(pixmap), pixmap.size())
+                pixmap_cache[piece] = pixmap
+
+def piece_icon(piece):
+    # (icon, size) for the piece, or None if its image could not be loaded.
+    if not icon_cache:
+        load_piece_icons()
+    return icon_cache[piece]
+
+def piece_pixmap(piece):
+    # The full-size image of the piece, or None if it could not be loaded.
+    if not pixmap_cache:
+        load_piece_icons()
+    return pixmap_cache[piece]
@@ -0,0 +1,530 @@
+# Compact position used inside ChessEngine's search. It keeps integer bitboards
+# and a 64-square mailbox and makes/unmakes moves by touching only the squares a
+# move changes. Moves are plain ints (see encode_move); chess.Board is only used
+# to build a Position and to convert moves back at the search boundary.
+import chess
+import chess.polyglot
+
+WHITE_KINGSIDE = 1
+WHITE_QUEENSIDE = 2
+BLACK_KINGSIDE = 4
+BLACK_QUEENSIDE = 8
+
+CAPTURE_FLAG = 1 << 15
+PROMOTION_TYPES = (chess.QUEEN, chess.KNIGHT, chess.ROOK, chess.BISHOP)
+
+ZOBRIST = chess.polyglot.POLYGLOT_RANDOM_ARRAY
+TURN_KEY = ZOBRIST[780]
+
+# PIECE_KEYS[code][square], where code = piece_type | color << 3.
+PIECE_KEYS = [[0] * 64 for _ in range(16)]
+for _color in chess.COLORS:
+    for _piece_type in chess.PIECE_TYPES:
+        PIECE_KEYS[_piece_type | _color << 3] = [
+            ZOBRIST[128 * (_piece_type - 1) + 64 * int(_color) + _square] for _square in chess.SQUARES]
+
+CASTLING_KEYS = [0] * 16
+for _rights in range(16):
+    for _bit, _index in ((WHITE_KINGSIDE, 768), (WHITE_QUEENSIDE, 769), (BLACK_KINGSIDE, 770), (BLACK_QUEENSIDE, 771)):
+        if _rights & _bit:
+            CASTLING_KEYS[_rights] ^= ZOBRIST[_index]
+
+# Castling rights that survive a move from or to each square.
+CASTLING_MASKS = [15] * 64
+CASTLING_MASKS[chess.E1] = 15 & ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_MASKS[chess.H1] = 15 & ~WHITE_KINGSIDE
+CASTLING_MASKS[chess.A1] = 15 & ~WHITE_QUEENSIDE
+CASTLING_MASKS[chess.E8] = 15 & ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_MASKS[chess.H8] = 15 & ~BLACK_KINGSIDE
+CASTLING_MASKS[chess.A8] = 15 & ~BLACK_QUEENSIDE
+
+KNIGHT_ATTACKS = chess.BB_KNIGHT_ATTACKS
+KING_ATTACKS = chess.BB_KING_ATTACKS
+PAWN_ATTACKS = chess.BB_PAWN_ATTACKS
+RANK_ATTACKS = chess.BB_RANK_ATTACKS
+FILE_ATTACKS = chess.BB_FILE_ATTACKS
+DIAG_ATTACKS = chess.BB_DIAG_ATTACKS
+RANK_MASKS = chess.BB_RANK_MASKS
+FILE_MASKS = chess.BB_FILE_MASKS
+DIAG_MASKS = chess.BB_DIAG_MASKS
+BB_ALL = chess.BB_ALL
+NOT_FILE_A = ~chess.BB_FILE_A & BB_ALL
+NOT_FILE_H = ~chess.BB_FILE_H & BB_ALL
+
+def encode_move(from_square, to_square, promotion=0, capture=False):
+    return from_square | to_square << 6 | (promotion or 0) << 12 | (CAPTURE_FLAG if capture else 0)
+
+def to_chess_move(move):
+    return chess.Move(move & 63, (move >> 6) & 63, (move >> 12) & 7 or None)
+
+class Position:
+    __slots__ = ('bitboards', 'occupied_co', 'occupied', 'squares', 'turn', 'castling', 'ep_square',
+                 'ep_hash', 'halfmove_clock', 'key', 'score', 'values', 'history', 'root_keys')
+
+    def __init__(self, board, values):
+        # values[code][square] is the material/placement score of a piece, signed
+        # from White's point of view; the position keeps its sum in self.score.
+        self.values = values
+        self.bitboards = [0] * 16
+        self.squares = [0] * 64
+        self.score = 0
+        for square, piece in board.piece_map().items():
+            code = piece.piece_type | piece.color << 3
+            self.bitboards[code] |= 1 << square
+            self.squares[square] = code
+            self.score += values[code][square]
+        self.occupied_co = [board.occupied_co[chess.BLACK], board.occupied_co[chess.WHITE]]
+        self.occupied = board.occupied
+        self.turn = int(board.turn)
+        rights = board.clean_castling_rights()
+        self.castling = ((WHITE_KINGSIDE if rights & chess.BB_H1 else 0) |
+                         (WHITE_QUEENSIDE if rights & chess.BB_A1 else 0) |
+                         (BLACK_KINGSIDE if rights & chess.BB_H8 else 0) |
+                         (BLACK_QUEENSIDE if rights & chess.BB_A8 else 0))
+        self.ep_square = board.ep_square
+        self.ep_hash = self.compute_ep_hash()
+        self.halfmove_clock = board.halfmove_clock
+        self.key = chess.polyglot.zobrist_hash(board)
+        self.history = []
+
+        # Keys of the positions before the root that a repetition could still reach.
+        self.root_keys = []
+        previous = board.copy()
+        for _ in range(min(board.halfmove_clock, len(board.move_stack))):
+            previous.pop()
+            self.root_keys.append(chess.polyglot.zobrist_hash(previous))
+
+    def compute_ep_hash(self):
+        # Polyglot only hashes the en passant file when a pawn can actually capture.
+        if self.ep_square is None:
+            return 0
+        if PAWN_ATTACKS[not self.turn][self.ep_square] & self.bitboards[chess.PAWN | self.turn << 3]:
+            return ZOBRIST[772 + (self.ep_square & 7)]
+        return 0
+
+    def piece_type_at(self, square):
+        return self.squares[square] & 7
+
+    def king_square(self, color):
+        return self.bitboards[chess.KING | color << 3].bit_length() - 1
+
+    def attackers_mask(self, square, occupied):
+        # Attackers of both colours against a custom occupancy, so x-rays are seen.
+        bitboards = self.bitboards
+        queens_and_rooks = bitboards[5] | bitboards[13] | bitboards[4] | bitboards[12]
+        queens_and_bishops = bitboards[5] | bitboards[13] | bitboards[3] | bitboards[11]
+        attackers = (
+            (KING_ATTACKS[square] & (bitboards[6] | bitboards[14])) |
+            (KNIGHT_ATTACKS[square] & (bitboards[2] | bitboards[10])) |
+            (RANK_ATTACKS[square][RANK_MASKS[square] & occupied] & queens_and_rooks) |
+            (FILE_ATTACKS[square][FILE_MASKS[square] & occupied] & queens_and_rooks) |
+            (DIAG_ATTACKS[square][DIAG_MASKS[square] & occupied] & queens_and_bishops) |
+            (PAWN_ATTACKS[chess.WHITE][square] & bitboards[1]) |
+            (PAWN_ATTACKS[chess.BLACK][square] & bitboards[9]))
+        return attackers & occupied
+
+    def is_attacked(self, square, color):
+        bitboards = self.bitboards
+        offset = color << 3
+        if KNIGHT_ATTACKS[square] & bitboards[chess.KNIGHT | offset]:
+            return True
+        if PAWN_ATTACKS[not color][square] & bitboards[chess.PAWN | offset]:
+            return True
+        if KING_ATTACKS[square] & bitboards[chess.KING | offset]:
+            return True
+        occupied = self.occupied
+        queens = bitboards[chess.QUEEN | offset]
+        queens_and_rooks = queens | bitboards[chess.ROOK | offset]
+        if queens_and_rooks and (RANK_ATTACKS[square][RANK_MASKS[square] & occupied] |
+                                 FILE_ATTACKS[square][FILE_MASKS[square] & occupied]) & queens_and_rooks:
+            return True
+        queens_and_bishops = queens | bitboards[chess.BISHOP | offset]
+        if queens_and_bishops and DIAG_ATTACKS[square][DIAG_MASKS[square] & occupied] & queens_and_bishops:
+            return True
+        return False
+
+    def in_check(self):
+        return self.is_attacked(self.king_square(self.turn), not self.turn)
+
+    def generate_moves(self, captures_only=False):
+        # Pseudo-legal moves; make() rejects the ones that leave the king in check.
+        moves = []
+        append = moves.append
+        us = self.turn
+        offset = us << 3
+        bitboards = self.bitboards
+        own = self.occupied_co[us]
+        their = self.occupied_co[not us]
+        occupied = self.occupied
+        targets = their if captures_only else ~own & BB_ALL
+
+        pawns = bitboards[chess.PAWN | offset]
+        if us:
+            promotion_rank = chess.BB_RANK_8
+            single = (pawns << 8) & ~occupied & BB_ALL
+            double = ((single & chess.BB_RANK_3) << 8) & ~occupied
+            left = ((pawns & NOT_FILE_A) << 7) & their
+            right = ((pawns & NOT_FILE_H) << 9) & their
+            push, left_delta, right_delta = 8, 7, 9
+        else:
+            promotion_rank = chess.BB_RANK_1
+            single = (pawns >> 8) & ~occupied
+            double = ((single & chess.BB_RANK_6) >> 8) & ~occupied
+            left = ((pawns & NOT_FILE_A) >> 9) & their
+            right = ((pawns & NOT_FILE_H) >> 7) & their
+            push, left_delta, right_delta = -8, -9, -7
+
+        for captures, delta in ((left, left_delta), (right, right_delta)):
+            while captures:
+                to_square = (captures & -captures).bit_length() - 1
+                captures &= captures - 1
+                from_square = to_square - delta
+                if (1 << to_square) & promotion_rank:
+                    for promotion in PROMOTION_TYPES:
+                        append(from_square | to_square << 6 | promotion << 12 | CAPTURE_FLAG)
+                else:
+                    append(from_square | to_square << 6 | CAPTURE_FLAG)
+        if self.ep_square is not None:
+            capturers = PAWN_ATTACKS[not us][self.ep_square] & pawns
+            while capturers:
+                from_square = (capturers & -capturers).bit_length() - 1
+                capturers &= capturers - 1
+                append(from_square | self.ep_square << 6 | CAPTURE_FLAG)
+
+        promotions = single & promotion_rank
+        while promotions:
+            to_square = (promotions & -promotions).bit_length() - 1
+            promotions &= promotions - 1
+            if captures_only:
+                append((to_square - push) | to_square << 6 | chess.QUEEN << 12)
+            else:
+                for promotion in PROMOTION_TYPES:
+                    append((to_square - push) | to_square << 6 | promotion << 12)
+        if not captures_only:
+            pushes = single & ~promotion_rank
+            while pushes:
+                to_square = (pushes & -pushes).bit_length() - 1
+                pushes &= pushes - 1
+                append((to_square - push) | to_square << 6)
+            while double:
+                to_square = (double & -double).bit_length() - 1
+                double &= double - 1
+                append((to_square - 2 * push) | to_square << 6)
+
+        for piece_type in (chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN, chess.KING):
+            pieces = bitboards[piece_type | offset]
+            while pieces:
+                from_square = (pieces & -pieces).bit_length() - 1
+                pieces &= pieces - 1
+                if piece_type == chess.KNIGHT:
+                    attacks = KNIGHT_ATTACKS[from_square]
+                elif piece_type == chess.KING:
+                    attacks = KING_ATTACKS[from_square]
+                else:
+                    attacks = 0
+                    if piece_type != chess.BISHOP:
+                        attacks = (RANK_ATTACKS[from_square][RANK_MASKS[from_square] & occupied] |
+                                   FILE_ATTACKS[from_square][FILE_MASKS[from_square] & occupied])
+                    if piece_type != chess.ROOK:
+                        attacks |= DIAG_ATTACKS[from_square][DIAG_MASKS[from_square] & occupied]
+                attacks &= targets
+                while attacks:
+                    to_square = (attacks & -attacks).bit_length() - 1
+                    attacks &= attacks - 1
+                    if their >> to_square & 1:
+                        append(from_square | to_square << 6 | CAPTURE_FLAG)
+                    else:
+                        append(from_square | to_square << 6)
+
+        if not captures_only and self.castling:
+            self.generate_castling(moves)
+        return moves
+
+    def generate_castling(self, moves):
+        us = self.turn
+        them = not us
+        occupied = self.occupied
+        if us:
+            kingside, queenside, king = WHITE_KINGSIDE, WHITE_QUEENSIDE, chess.E1
+        else:
+            kingside, queenside, king = BLACK_KINGSIDE, BLACK_QUEENSIDE, chess.E8
+        if not self.castling & (kingside | queenside) or self.is_attacked(king, them):
+            return
+        if self.castling & kingside and not occupied & (0b11 << (king + 1)) \
+                and not self.is_attacked(king + 1, them):
+            moves.append(king | (king + 2) << 6)
+        if self.castling & queenside and not occupied & (0b111 << (king - 3)) \
+                and not self.is_attacked(king - 1, them):
+            moves.append(king | (king - 2) << 6)
+
+    def make(self, move):
+        # Plays a pseudo-legal move. Returns False (with the move already taken back)
+        # if it would leave the mover's king in check.
+        from_square = move & 63
+        to_square = (move >> 6) & 63
+        promotion = (move >> 12) & 7
+        squares = self.squares
+        bitboards = self.bitboards
+        values = self.values
+        us = self.turn
+        them = us ^ 1
+        code = squares[from_square]
+        piece_type = code & 7
+        captured = squares[to_square]
+        from_bit = 1 << from_square
+        to_bit = 1 << to_square
+        key = self.key
+        score = self.score
+
+        self.history.append((move, captured, self.castling, self.ep_square, self.ep_hash,
+                             self.halfmove_clock, key, score))
+
+        bitboards[code] ^= from_bit
+        squares[from_square] = 0
+        key ^= PIECE_KEYS[code][from_square]
+        score -= values[code][from_square]
+        if captured:
+            bitboards[captured] ^= to_bit
+            self.occupied_co[them] ^= to_bit
+            key ^= PIECE_KEYS[captured][to_square]
+            score -= values[captured][to_square]
+        elif piece_type == chess.PAWN and to_square == self.ep_square:
+            captured_square = to_square - 8 if us else to_square + 8
+            captured_code = chess.PAWN | them << 3
+            bitboards[captured_code] ^= 1 << captured_square
+            self.occupied_co[them] ^= 1 << captured_square
+            squares[captured_square] = 0
+            key ^= PIECE_KEYS[captured_code][captured_square]
+            score -= values[captured_code][captured_square]
+
+        placed = promotion | us << 3 if promotion else code
+        bitboards[placed] |= to_bit
+        squares[to_square] = placed
+        key ^= PIECE_KEYS[placed][to_square]
+        score += values[placed][to_square]
+        self.occupied_co[us] ^= from_bit | to_bit
+
+        if piece_type == chess.KING and (to_square - from_square == 2 or from_square - to_square == 2):
+            if to_square > from_square:
+                rook_from, rook_to = to_square + 1, to_square - 1
+            else:
+                rook_from, rook_to = to_square - 2, to_square + 1
+            rook = chess.ROOK | us << 3
+            rook_bits = (1 << rook_from) | (1 << rook_to)
+            bitboards[rook] ^= rook_bits
+            self.occupied_co[us] ^= rook_bits
+            squares[rook_from] = 0
+            squares[rook_to] = rook
+            key ^= PIECE_KEYS[rook][rook_from] ^ PIECE_KEYS[rook][rook_to]
+            score += values[rook][rook_to] - values[rook][rook_from]
+
+        castling = self.castling & CASTLING_MASKS[from_square] & CASTLING_MASKS[to_square]
+        if castling != self.castling:
+            key ^= CASTLING_KEYS[self.castling] ^ CASTLING_KEYS[castling]
+            self.castling = castling
+
+        self.occupied = self.occupied_co[0] | self.occupied_co[1]
+        self.turn = them
+        key ^= self.ep_hash ^ TURN_KEY
+        if piece_type == chess.PAWN and (to_square - from_square == 16 or from_square - to_square == 16):
+            self.ep_square = (from_square + to_square) >> 1
+            self.ep_hash = self.compute_ep_hash()
+            key ^= self.ep_hash
+        else:
+            self.ep_square = None
+            self.ep_hash = 0
+        self.halfmove_clock = 0 if piece_type == chess.PAWN or captured else self.halfmove_clock + 1
+        self.key = key
+        self.score = score
+
+        if self.is_attacked(self.king_square(us), them):
+            self.unmake()
+            return False
+        return True
+
+    def unmake(self):
+        move, captured, castling, ep_square, ep_hash, halfmove_clock, key, score = self.history.pop()
+        from_square = move & 63
+        to_square = (move >> 6) & 63
+        promotion = (move >> 12) & 7
+        squares = self.squares
+        bitboards = self.bitboards
+        them = self.turn
+        us = them ^ 1
+        placed = squares[to_square]
+        code = chess.PAWN | us << 3 if promotion else placed
+        from_bit = 1 << from_square
+        to_bit = 1 << to_square
+
+        bitboards[placed] ^= to_bit
+        bitboards[code] |= from_bit
+        squares[from_square] = code
+        squares[to_square] = captured
+        self.occupied_co[us] ^= from_bit | to_bit
+        if captured:
+            bitboards[captured] |= to_bit
+            self.occupied_co[them] |= to_bit
+        elif code & 7 == chess.PAWN and to_square == ep_square:
+            captured_square = to_square - 8 if us else to_square + 8
+            bitboards[chess.PAWN | them << 3] |= 1 << captured_square
+            self.occupied_co[them] |= 1 << captured_square
+            squares[captured_square] = chess.PAWN | them << 3
+        elif code & 7 == chess.KING and (to_square - from_square == 2 or from_square - to_square == 2):
+            if to_square > from_square:
+                rook_from, rook_to = to_square + 1, to_square - 1
+            else:
+                rook_from, rook_to = to_square - 2, to_square + 1
+            rook = chess.ROOK | us << 3
+            rook_bits = (1 << rook_from) | (1 << rook_to)
+            bitboards[rook] ^= rook_bits
+            self.occupied_co[us] ^= rook_bits
+            squares[rook_to] = 0
+            squares[rook_from] = rook
+
+        self.occupied = self.occupied_co[0] | self.occupied_co[1]
+        self.turn = us
+        self.castling = castling
+        self.ep_square = ep_square
+        self.ep_hash = ep_hash
+        self.halfmove_clock = halfmove_clock
+        self.key = key
+        self.score = score
+
+    def make_null(self):
+        self.history.append((0, 0, self.castling, self.ep_square, self.ep_hash,
+                             self.halfmove_clock, self.key, self.score))
+        self.key ^= self.ep_hash ^ TURN_KEY
+        self.ep_square = None
+        self.ep_hash = 0
+        self.turn ^= 1
+        self.halfmove_clock += 1
+
+    def unmake_null(self):
+        _, _, castling, ep_square, ep_hash, halfmove_clock, key, score = self.history.pop()
+        self.turn ^= 1
+        self.ep_square = ep_square
+        self.ep_hash = ep_hash
+        self.halfmove_clock = halfmove_clock
+        self.key = key
+
+    def legal_moves(self):
+        moves = []
+        for move in self.generate_moves():
+            if self.make(move):
+                self.unmake()
+                moves.append(move)
+        return moves
+
+    def has_legal_move(self):
+        for move in self.generate_moves():
+            if self.make(move):
+                self.unmake()
+                return True
+        return False
+
+    def is_insufficient_material(self):
+        bitboards = self.bitboards
+        if bitboards[1] | bitboards[9] | bitboards[4] | bitboards[12] | bitboards[5] | bitboards[13]:
+            return False
+        knights = bitboards[2] | bitboards[10]
+        bishops = bitboards[3] | bitboards[11]
+        if not knights and (not bishops & chess.BB_DARK_SQUARES or not bishops & chess.BB_LIGHT_SQUARES):
+            return True
+        return bin(knights | bishops).count('1') <= 1
+
+    def repetitions(self):
+        # Occurrences of the current position, scanning back only as far as the
+        # last capture or pawn move.
+        count = 1
+        key = self.key
+        history = self.history
+        reach = self.halfmove_clock
+        index = len(history) - 1
+        while reach > 0 and index >= 0:
+            if not history[index][0]:
+                return count
+            if history[index][6] == key:
+                count += 1
+            index -= 1
+            reach -= 1
+        for root_key in self.root_keys[:reach]:
+            if root_key == key:
+                count += 1
+        return count
+
+    def is_repetition(self):
+        # Whether the current position occurred before, comparing only the keys
+        # with the same side to move back to the last capture, pawn move or null move.
+        key = self.key
+        history = self.history
+        length = len(history)
+        for distance in range(1, self.halfmove_clock + 1):
+            if distance <= length:
+                entry = history[length - distance]
+                if not entry[0]:
+                    return False
+                if distance & 1 == 0 and entry[6] == key:
+                    return True
+            elif distance - length > len(self.root_keys):
+                return False
+            elif distance & 1 == 0 and self.root_keys[distance - length - 1] == key:
+                return True
+        return False
+
+    def piece_count(self):
+        return bin(self.occupied).count('1')
+
+    def to_board(self):
+        # Rebuilds a chess.Board for code that needs one, e.g. tablebase probes.
+        # The move history is not carried over.
+        board = chess.Board.empty()
+        for square in chess.scan_forward(self.occupied):
+            code = self.squares[square]
+            board.set_piece_at(square, chess.Piece(code & 7, bool(code >> 3)))
+        board.turn = bool(self.turn)
+        rights = 0
+        for bit, square in ((WHITE_KINGSIDE, chess.H1), (WHITE_QUEENSIDE, chess.A1),
+                            (BLACK_KINGSIDE, chess.H8), (BLACK_QUEENSIDE, chess.A8)):
+            if self.castling & bit:
+                rights |= chess.BB_SQUARES[square]
+        board.castling_rights = rights
+        board.ep_square = self.ep_square
+        board.halfmove_clock = self.halfmove_clock
+        return board
+
+    def is_game_over(self):
+        # The same conditions as chess.Board.is_game_over() without claims.
+        return (self.halfmove_clock >= 150 or self.is_insufficient_material()
+                or self.repetitions() >= 5 or not self.has_legal_move())
+
+    def move_from_chess(self, move):
+        for candidate in self.generate_moves():
+            if candidate & 63 == move.from_square and (candidate >> 6) & 63 == move.to_square \
+                    and ((candidate >> 12) & 7 or None) == move.promotion:
+                return candidate
+        return None
+
+    def is_legal(self, move):
+        if move in self.generate_moves() and self.make(move):
+            self.unmake()
+            return True
+        return False
+
+    def perft(self, depth):
+        if depth == 0:
+            return 1
+        nodes = 0
+        for move in self.generate_moves():
+            if self.make(move):
+                nodes += self.perft(depth - 1) if depth > 1 else 1
+                self.unmake()
+        return nodes
+
+    def unwind(self, length=0):
+        # Takes back moves (and null moves) until only length remain, e.g. after the
+        # search was aborted somewhere deep in the tree.
+        while len(self.history) > length:
+            if self.history[-1][0]:
+                self.unmake()
+            else:
+                self.unmake_null()
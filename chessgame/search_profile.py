@@ -0,0 +1,110 @@
+# Looks inside a single ChessEngine search: per-iteration statistics, an optional
+# cProfile report and an optional dump of the search tree, e.g.
+#   python -m chessgame.search_profile --fen "<fen>" --depth 4 --profile --trace tree.txt
+import argparse
+import cProfile
+import io
+import json
+import pstats
+import chess
+from .engine import ChessEngine
+from .position import to_chess_move
+
+class TracingEngine(ChessEngine):
+    # Records every alphabeta and quiescence node (up to max_trace_nodes) in
+    # search order. The plain engine pays nothing for this.
+    def __init__(self, *args, max_trace_nodes=200000, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_trace_nodes = max_trace_nodes
+        self.trace = []
+
+    def trace_node(self, kind, position, depth, alpha, beta, ply):
+        if len(self.trace) >= self.max_trace_nodes:
+            return None
+        last_move = position.history[-1][0] if position.history else None
+        node = {'kind': kind, 'ply': ply, 'move': last_move, 'depth': depth, 'alpha': alpha, 'beta': beta,
+                'score': None}
+        self.trace.append(node)
+        return node
+
+    def alphabeta(self, position, depth, alpha, beta, ply=1, allow_null=True):
+        node = self.trace_node('main', position, depth, alpha, beta, ply)
+        score = super().alphabeta(position, depth, alpha, beta, ply, allow_null)
+        if node is not None:
+            node['score'] = score
+        return score
+
+    def quiescence(self, position, alpha, beta, ply):
+        node = self.trace_node('qs', position, 0, alpha, beta, ply)
+        score = super().quiescence(position, alpha, beta, ply)
+        if node is not None:
+            node['score'] = score
+        return score
+
+def format_move(move):
+    if move is None:
+        return 'root'
+    if not move:
+        return 'null'
+    return to_chess_move(move).uci()
+
+def write_trace(trace, path):
+    # One line per node, indented by ply. A node without a score was cut off by the
+    # time or node limit.
+    with open(path, 'w') as trace_file:
+        for node in trace:
+            score = node['score'] if node['score'] is not None else '?'
+            trace_file.write(f"{'  ' * node['ply']}{format_move(node['move'])} {node['kind']} "
+                             f"d={node['depth']} [{node['alpha']}, {node['beta']}] -> {score}\n")
+
+def profile_search(engine, board, movetime_ms=None, nodes=None, sort='cumulative', limit=30):
+    # Runs one search under cProfile and returns (result, report text).
+    profiler = cProfile.Profile()
+    result = profiler.runcall(engine.search, board, movetime_ms, nodes)
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats(sort).print_stats(limit)
+    return result, output.getvalue()
+
+def main():
+    parser = argparse.ArgumentParser(description='Statistics, profile and trace of one ChessEngine search.')
+    parser.add_argument('--fen', default=chess.STARTING_FEN, help='position to search')
+    parser.add_argument('--depth', type=int, default=4, help='search depth in plies')
+    parser.add_argument('--movetime', type=int, help='time budget in milliseconds instead of a depth')
+    parser.add_argument('--nodes', type=int, help='node budget instead of a depth')
+    parser.add_argument('--profile', action='store_true', help='print a cProfile report of the search')
+    parser.add_argument('--sort', default='cumulative', help='cProfile sort key')
+    parser.add_argument('--trace', help='write the search tree to this file')
+    parser.add_argument('--trace-nodes', type=int, default=200000, help='maximum number of traced nodes')
+    args = parser.parse_args()
+
+    board = chess.Board(args.fen)
+    if args.trace:
+        engine = TracingEngine(max(args.depth - 1, 0), max_trace_nodes=args.trace_nodes)
+    else:
+        engine = ChessEngine(max(args.depth - 1, 0))
+    if args.profile:
+        result, report = profile_search(engine, board, args.movetime, args.nodes, args.sort)
+        print(report)
+    else:
+        result = engine.search(board, args.movetime, args.nodes)
+    if args.trace:
+        write_trace(engine.trace, args.trace)
+
+    table = engine.transposition_table
+    stats = engine.stats.as_dict()
+    for data in stats['iterations']:
+        data['pv'] = [move.uci() for move in data['pv']]
+    print(json.dumps({
+        'move': result.move.uci() if result.move else None,
+        'score': result.score,
+        'depth': result.depth,
+        'nodes': result.nodes,
+        'tt_probes': table.probes,
+        'tt_hits': table.hits,
+        'cutoffs': engine.move_orderer.cutoffs,
+        'first_move_cutoff_rate': round(engine.move_orderer.first_move_cutoff_rate(), 4),
+        **stats,
+    }, indent=2))
+
+if __name__ == '__main__':
+    main()
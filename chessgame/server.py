@@ -0,0 +1,420 @@
+# Game server: many simultaneous games against the engine over TCP, e.g.
+#   python -m chessgame.server --port 8765 --workers 4 --movetime 200
+# Clients send one JSON object per line and get one back per request, echoing
+# its "id" if it had one. A request that fails with an error (e.g. "busy" when
+# the search queue is full) leaves its game as it was, so it can be retried:
+#   {"cmd": "new", "color": "white", "movetime": 200, "budget": 60000}
+#   {"cmd": "move", "game": 1, "move": "e2e4"}
+#   {"cmd": "state", "game": 1}
+#   {"cmd": "close", "game": 1}
+#   {"cmd": "metrics"}
+# Games live in memory as chess.Board objects. Engine searches run in a fixed
+# pool of processes. Waiting searches are queued per client and taken round-robin,
+# so one client with many games cannot starve the others.
+import argparse
+import asyncio
+import collections
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import chess
+from .engine import ChessEngine
+
+DEFAULT_MOVETIME_MS = 200
+DEFAULT_BUDGET_MS = 5 * 60 * 1000
+MIN_MOVETIME_MS = 10
+DEFAULT_MOVES_TO_GO = 30
+DEFAULT_MAX_QUEUE = 256
+METRIC_SAMPLES = 2000
+
+worker_engine = None
+
+def init_worker(tt_size, book_path, tablebase_path):
+    global worker_engine
+    worker_engine = ChessEngine(ChessEngine.MAX_DEPTH - 1, tt_size, book_path=book_path,
+                                tablebase_path=tablebase_path)
+
+def search_position(board, movetime_ms):
+    # Runs in a pool process. The board carries its move stack, so the search
+    # sees repetitions of positions played earlier in the game.
+    start = time.perf_counter()
+    result = worker_engine.search(board, movetime_ms)
+    elapsed = time.perf_counter() - start
+    return result.move.uci() if result.move else None, result.score, result.depth, result.nodes, elapsed
+
+class ServerBusy(Exception):
+    # The search queue is full; the client should retry later.
+    pass
+
+class RequestError(Exception):
+    pass
+
+class Game:
+    def __init__(self, game_id, client_id, engine_color, movetime_ms, budget_ms, fen=None):
+        self.id = game_id
+        self.client_id = client_id
+        self.board = chess.Board(fen) if fen else chess.Board()
+        self.engine_color = engine_color
+        self.movetime_ms = movetime_ms
+        self.remaining_ms = budget_ms
+        self.searching = False
+
+    def next_movetime(self):
+        # The per-move time, cut down once the game's engine budget runs low.
+        share = self.remaining_ms // DEFAULT_MOVES_TO_GO
+        return max(MIN_MOVETIME_MS, min(self.movetime_ms, share))
+
+    def state(self):
+        outcome = self.board.outcome(claim_draw=True)
+        return {
+            'game': self.id,
+            'fen': self.board.fen(),
+            'turn': 'white' if self.board.turn == chess.WHITE else 'black',
+            'engine': 'white' if self.engine_color == chess.WHITE else 'black',
+            'result': outcome.result() if outcome else None,
+            'remaining_ms': self.remaining_ms,
+        }
+
+def percentiles(samples):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    return {
+        'count': len(ordered),
+        'mean': round(sum(ordered) / len(ordered), 2),
+        'p50': round(ordered[last * 50 // 100], 2),
+        'p95': round(ordered[last * 95 // 100], 2),
+        'p99': round(ordered[last * 99 // 100], 2),
+        'max': round(ordered[last], 2),
+    }
+
+class Metrics:
+    # Recent samples of each latency in milliseconds, plus running counters.
+    def __init__(self):
+        self.queue_ms = collections.deque(maxlen=METRIC_SAMPLES)
+        self.search_ms = collections.deque(maxlen=METRIC_SAMPLES)
+        self.latency_ms = collections.deque(maxlen=METRIC_SAMPLES)
+        self.searches = 0
+        self.rejected = 0
+        self.errors = 0
+        self.max_queue_depth = 0
+        self.started = time.monotonic()
+
+    def record(self, queue_ms, search_ms, latency_ms):
+        self.searches += 1
+        self.queue_ms.append(queue_ms)
+        self.search_ms.append(search_ms)
+        self.latency_ms.append(latency_ms)
+
+    def snapshot(self):
+        return {
+            'uptime': round(time.monotonic() - self.started, 1),
+            'searches': self.searches,
+            'rejected': self.rejected,
+            'errors': self.errors,
+            'max_queue_depth': self.max_queue_depth,
+            'queue_ms': percentiles(self.queue_ms),
+            'search_ms': percentiles(self.search_ms),
+            'latency_ms': percentiles(self.latency_ms),
+        }
+
+class SearchScheduler:
+    # Hands searches to the process pool, never more than it has workers, so the
+    # waiting happens here where it can be measured and ordered. Clients are
+    # served round-robin, each client's searches in arrival order.
+    def __init__(self, executor, workers, metrics, max_queue=DEFAULT_MAX_QUEUE):
+        self.executor = executor
+        self.metrics = metrics
+        self.max_queue = max_queue
+        self.queues = collections.OrderedDict()
+        self.queued = 0
+        self.in_flight = 0
+        self.slots = asyncio.Semaphore(workers)
+        self.ready = asyncio.Event()
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.ensure_future(self.dispatch())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+    def submit(self, client_id, board, movetime_ms):
+        if self.queued >= self.max_queue:
+            self.metrics.rejected += 1
+            raise ServerBusy()
+        future = asyncio.get_running_loop().create_future()
+        self.queues.setdefault(client_id, collections.deque()).append(
+            (board, movetime_ms, future, time.monotonic()))
+        self.queued += 1
+        self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, self.queued)
+        self.ready.set()
+        return future
+
+    def drop_client(self, client_id):
+        for _, _, future, _ in self.queues.pop(client_id, ()):
+            self.queued -= 1
+            future.cancel()
+
+    def next_request(self):
+        for client_id, queue in self.queues.items():
+            if queue:
+                request = queue.popleft()
+                self.queues.move_to_end(client_id)
+                self.queued -= 1
+                return request
+        return None
+
+    async def dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.slots.acquire()
+            request = self.next_request()
+            while request is None:
+                self.ready.clear()
+                await self.ready.wait()
+                request = self.next_request()
+            board, movetime_ms, future, queued_at = request
+            if future.cancelled():
+                self.slots.release()
+                continue
+            self.in_flight += 1
+            started = time.monotonic()
+            search = loop.run_in_executor(self.executor, search_position, board, movetime_ms)
+            search.add_done_callback(lambda done, future=future, queued_at=queued_at, started=started:
+                                     self.finish(done, future, queued_at, started))
+
+    def finish(self, done, future, queued_at, started):
+        self.in_flight -= 1
+        self.slots.release()
+        now = time.monotonic()
+        if done.cancelled():
+            future.cancel()
+            return
+        if done.exception() is not None:
+            self.metrics.errors += 1
+            if not future.cancelled():
+                future.set_exception(done.exception())
+            return
+        self.metrics.record((started - queued_at) * 1000, (now - started) * 1000, (now - queued_at) * 1000)
+        if not future.cancelled():
+            future.set_result(done.result())
+
+class GameServer:
+    def __init__(self, workers=None, movetime_ms=DEFAULT_MOVETIME_MS, budget_ms=DEFAULT_BUDGET_MS,
+                 max_queue=DEFAULT_MAX_QUEUE, tt_size=1 << 16, book_path=None, tablebase_path=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.movetime_ms = movetime_ms
+        self.budget_ms = budget_ms
+        self.max_queue = max_queue
+        self.engine_settings = (tt_size, book_path, tablebase_path)
+        self.games = {}
+        self.game_ids = itertools.count(1)
+        self.client_ids = itertools.count(1)
+        self.clients = 0
+        self.connections = {}
+        self.metrics = Metrics()
+        self.executor = None
+        self.scheduler = None
+        self.server = None
+
+    async def start(self, host='127.0.0.1', port=8765):
+        self.executor = ProcessPoolExecutor(self.workers, initializer=init_worker, initargs=self.engine_settings)
+        self.scheduler = SearchScheduler(self.executor, self.workers, self.metrics, self.max_queue)
+        self.scheduler.start()
+        self.server = await asyncio.start_server(self.handle_client, host, port)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            # Closed connections make their handlers finish on their own.
+            handlers = list(self.connections)
+            for writer in self.connections.values():
+                writer.close()
+            await asyncio.gather(*handlers, return_exceptions=True)
+            await self.server.wait_closed()
+        if self.scheduler is not None:
+            await self.scheduler.stop()
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+
+    def metrics_snapshot(self):
+        snapshot = self.metrics.snapshot()
+        snapshot.update({
+            'workers': self.workers,
+            'clients': self.clients,
+            'games': len(self.games),
+            'queue_depth': self.scheduler.queued,
+            'in_flight': self.scheduler.in_flight,
+        })
+        return snapshot
+
+    async def handle_client(self, reader, writer):
+        client_id = next(self.client_ids)
+        self.clients += 1
+        self.connections[asyncio.current_task()] = writer
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                # Requests run concurrently, so a search in one game does not hold
+                # up the client's other games.
+                task = asyncio.ensure_future(self.respond(client_id, line, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except ConnectionError:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.scheduler.drop_client(client_id)
+            for game_id in [game_id for game_id, game in self.games.items() if game.client_id == client_id]:
+                del self.games[game_id]
+            self.clients -= 1
+            del self.connections[asyncio.current_task()]
+            writer.close()
+
+    async def respond(self, client_id, line, writer, write_lock):
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise RequestError('a request must be a JSON object')
+            request_id = request.get('id')
+            response = await self.handle(client_id, request)
+        except ServerBusy:
+            response = {'error': 'busy'}
+        except (RequestError, ValueError) as error:
+            response = {'error': str(error)}
+        except Exception as error:
+            # A failed search is reported to the client; the server keeps running.
+            response = {'error': f'internal error: {error!r}'}
+        if request_id is not None:
+            response['id'] = request_id
+        async with write_lock:
+            try:
+                writer.write((json.dumps(response) + '\n').encode())
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+    def get_game(self, client_id, request):
+        game = self.games.get(request.get('game'))
+        if game is None or game.client_id != client_id:
+            raise RequestError('unknown game')
+        return game
+
+    async def handle(self, client_id, request):
+        command = request.get('cmd')
+        if command == 'new':
+            color = request.get('color', 'white')
+            if color not in ('white', 'black'):
+                raise RequestError('color must be white or black')
+            game = Game(next(self.game_ids), client_id, chess.BLACK if color == 'white' else chess.WHITE,
+                        int(request.get('movetime', self.movetime_ms)), int(request.get('budget', self.budget_ms)),
+                        request.get('fen'))
+            if not game.board.is_valid():
+                raise RequestError('invalid position')
+            self.games[game.id] = game
+            response = {}
+            if game.board.turn == game.engine_color and not game.board.is_game_over():
+                try:
+                    response = await self.engine_move(game)
+                except Exception:
+                    # The error response carries no game id, so the game is dropped.
+                    self.games.pop(game.id, None)
+                    raise
+            return {**game.state(), **response}
+        if command == 'move':
+            game = self.get_game(client_id, request)
+            if game.searching or game.board.turn == game.engine_color:
+                raise RequestError('not your move')
+            if game.board.is_game_over(claim_draw=True):
+                raise RequestError('the game is over')
+            try:
+                move = game.board.parse_uci(str(request.get('move')))
+            except ValueError:
+                raise RequestError('illegal move')
+            game.board.push(move)
+            response = {}
+            if not game.board.is_game_over(claim_draw=True):
+                try:
+                    response = await self.engine_move(game)
+                except Exception:
+                    # Without an engine reply the move is taken back, so the
+                    # client can send it again, e.g. after a busy error.
+                    game.board.pop()
+                    raise
+            return {**game.state(), **response}
+        if command == 'state':
+            return self.get_game(client_id, request).state()
+        if command == 'close':
+            game = self.get_game(client_id, request)
+            del self.games[game.id]
+            return {'game': game.id, 'closed': True}
+        if command == 'metrics':
+            return self.metrics_snapshot()
+        raise RequestError(f'unknown command {command!r}')
+
+    async def engine_move(self, game):
+        movetime_ms = game.next_movetime()
+        game.searching = True
+        start = time.monotonic()
+        try:
+            move, score, depth, nodes, elapsed = await self.scheduler.submit(game.client_id, game.board.copy(),
+                                                                            movetime_ms)
+        finally:
+            game.searching = False
+        game.remaining_ms = max(0, game.remaining_ms - int(elapsed * 1000))
+        if game.id not in self.games:
+            raise RequestError('the game was closed')
+        if move is not None:
+            game.board.push_uci(move)
+        return {'engine_move': move, 'score': score, 'depth': depth, 'nodes': nodes,
+                'latency_ms': round((time.monotonic() - start) * 1000, 1)}
+
+async def serve(args):
+    server = GameServer(args.workers, args.movetime, args.budget, args.max_queue,
+                        book_path=args.book, tablebase_path=args.syzygy)
+    host, port = await server.start(args.host, args.port)
+    print(f'Serving on {host}:{port} with {server.workers} engine processes', file=sys.stderr)
+    try:
+        while True:
+            await asyncio.sleep(args.metrics_interval or 3600)
+            if args.metrics_interval:
+                print(json.dumps(server.metrics_snapshot()), file=sys.stderr)
+    finally:
+        await server.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve engine games over TCP, one JSON request per line.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None, help='engine processes (default: CPU count)')
+    parser.add_argument('--movetime', type=int, default=DEFAULT_MOVETIME_MS, help='default milliseconds per move')
+    parser.add_argument('--budget', type=int, default=DEFAULT_BUDGET_MS, help='default engine time per game in ms')
+    parser.add_argument('--max-queue', type=int, default=DEFAULT_MAX_QUEUE, help='queued searches before "busy"')
+    parser.add_argument('--book', help='Polyglot opening book')
+    parser.add_argument('--syzygy', help='directory with Syzygy tablebases')
+    parser.add_argument('--metrics-interval', type=float, default=0, help='seconds between metric lines on stderr')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# Startup-time benchmark: imports each entry point in a fresh interpreter and
+# checks that it stays cheap and does not drag in heavy optional modules, e.g.
+#   python -m chessgame.startup --repeat 5 --max-ms 300
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# (module, modules it must not import)
+ENTRY_POINTS = [
+    ('chessgame', ['chess', 'PyQt5']),
+    ('chessgame.engine', ['PyQt5', 'sqlite3', 'chess.syzygy', 'multiprocessing', 'chess.pgn']),
+    ('chessgame.cli', ['PyQt5', 'sqlite3', 'chess.syzygy']),
+    ('chessgame.uci', ['PyQt5', 'sqlite3', 'chess.syzygy']),
+    ('chessgame.analyse', ['PyQt5', 'sqlite3', 'chess.syzygy']),
+    ('chessgame.match', ['PyQt5', 'sqlite3', 'chess.syzygy']),
+    ('chessgame.server', ['PyQt5', 'sqlite3', 'chess.syzygy']),
+]
+
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'time': elapsed, 'modules': sorted(sys.modules)}}))
+'''
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def measure(module, repeat):
+    # Best of repeat runs, each in a new interpreter so nothing is cached in-process.
+    best = None
+    modules = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', PROBE.format(module=module)], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout
+        data = json.loads(output)
+        if best is None or data['time'] < best:
+            best = data['time']
+        modules = data['modules']
+    return best, modules
+
+def run(repeat, max_ms):
+    baseline, _ = measure('chess', repeat)
+    results = []
+    for module, forbidden in ENTRY_POINTS:
+        elapsed, modules = measure(module, repeat)
+        loaded = [name for name in forbidden if name in modules]
+        results.append({
+            'module': module,
+            'ms': round(elapsed * 1000, 1),
+            'forbidden_imports': loaded,
+            'ok': not loaded and (max_ms is None or elapsed * 1000 <= max_ms),
+        })
+    return {'python_chess_ms': round(baseline * 1000, 1), 'results': results,
+            'ok': all(result['ok'] for result in results)}
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the import cost of the chessgame entry points.')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per module; the fastest counts')
+    parser.add_argument('--max-ms', type=float, default=None, help='fail if an import takes longer')
+    args = parser.parse_args()
+    report = run(args.repeat, args.max_ms)
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report['ok'] else 1)
+
+if __name__ == '__main__':
+    main()
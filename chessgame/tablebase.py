@@ -0,0 +1,64 @@
+# Syzygy endgame tablebase probing for ChessEngine. The tables are read from a
+# local directory of .rtbw (WDL) and .rtbz (DTZ) files; WDL results are kept in
+# an in-memory LRU cache keyed by the position's Zobrist key.
+from collections import OrderedDict
+import chess
+import chess.syzygy
+
+class Tablebase:
+    def __init__(self, directory, cache_size=1 << 16):
+        self.directory = directory
+        self.tables = chess.syzygy.open_tablebase(directory)
+        # Table names look like KRvKP, so the piece count is the name minus the 'v'.
+        self.max_pieces = max((len(name) - 1 for name in self.tables.wdl), default=0)
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.probes = 0
+        self.hits = 0
+
+    def close(self):
+        self.tables.close()
+        self.cache.clear()
+
+    def covers(self, position):
+        # Syzygy tables have no castling positions.
+        return not position.castling and position.piece_count() <= self.max_pieces
+
+    def probe_wdl(self, position):
+        # Win/draw/loss for the side to move (2 win, 1 cursed win, 0 draw,
+        # -1 blessed loss, -2 loss), or None when no table covers the position.
+        key = position.key
+        cache = self.cache
+        self.probes += 1
+        if key in cache:
+            self.hits += 1
+            cache.move_to_end(key)
+            return cache[key]
+        wdl = self.tables.get_wdl(position.to_board())
+        cache[key] = wdl
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return wdl
+
+    def probe_root(self, board, root_moves=None):
+        # Picks the root move from the DTZ tables: the best WDL outcome, then the
+        # fastest win or slowest loss by distance to zeroing. Returns (move, wdl),
+        # or None when the tables cannot decide the position.
+        if board.castling_rights or chess.popcount(board.occupied) > self.max_pieces:
+            return None
+        best = None
+        for move in (root_moves if root_moves is not None else board.legal_moves):
+            child = board.copy(stack=False)
+            child.push(move)
+            if child.is_checkmate():
+                return move, 2
+            try:
+                wdl = -self.tables.probe_wdl(child)
+                dtz = self.tables.probe_dtz(child)
+            except KeyError:
+                return None
+            if best is None or (wdl, dtz) > best[0]:
+                best = (wdl, dtz), move
+        if best is None:
+            return None
+        return best[1], best[0][0]
@@ -0,0 +1,250 @@
+# UCI front-end for ChessEngine, so any UCI GUI or match runner can drive it as a
+# long-lived engine process:
+#   python -m chessgame.uci
+import sys
+import threading
+import time
+import chess
+from .engine import ChessEngine
+
+ENGINE_NAME = 'ChessGame'
+ENGINE_AUTHOR = 'Deveshwar Saste'
+
+# Rough memory cost of one transposition table slot holding a Python tuple.
+HASH_ENTRY_BYTES = 128
+DEFAULT_HASH_MB = 32
+MAX_HASH_MB = 4096
+MAX_THREADS = 64
+MOVE_OVERHEAD_MS = 50
+DEFAULT_MOVES_TO_GO = 30
+
+class UciEngine:
+    def __init__(self, output=None):
+        self.output = output if output is not None else sys.stdout
+        self.output_lock = threading.Lock()
+        self.options = {'Hash': DEFAULT_HASH_MB, 'Threads': 1, 'BookFile': '', 'SyzygyPath': '',
+                        'CacheFile': ''}
+        self.engine = None
+        self.board = chess.Board()
+        self.search_thread = None
+        # Set by stop; a go infinite search holds its bestmove until then.
+        self.stop_requested = threading.Event()
+
+    def send(self, line):
+        with self.output_lock:
+            self.output.write(line + '\n')
+            self.output.flush()
+
+    def table_size(self):
+        return self.options['Hash'] * 1024 * 1024 // HASH_ENTRY_BYTES
+
+    def get_engine(self):
+        # Built on first use, so the options set before it cost nothing to change.
+        if self.engine is None:
+            self.engine = ChessEngine(ChessEngine.MAX_DEPTH - 1, self.table_size(),
+                                      workers=self.options['Threads'],
+                                      book_path=self.options['BookFile'] or None,
+                                      tablebase_path=self.options['SyzygyPath'] or None,
+                                      cache_path=self.options['CacheFile'] or None)
+        return self.engine
+
+    def close_engine(self):
+        if self.engine is not None:
+            self.engine.close()
+            self.engine = None
+
+    def run(self, lines):
+        for line in lines:
+            if not self.handle(line):
+                break
+        self.stop_search()
+        self.close_engine()
+
+    def handle(self, line):
+        # Returns False on quit.
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+        if command == 'quit':
+            return False
+        if command == 'uci':
+            self.send(f'id name {ENGINE_NAME}')
+            self.send(f'id author {ENGINE_AUTHOR}')
+            self.send(f'option name Hash type spin default {DEFAULT_HASH_MB} min 1 max {MAX_HASH_MB}')
+            self.send(f'option name Threads type spin default 1 min 1 max {MAX_THREADS}')
+            self.send('option name BookFile type string default <empty>')
+            self.send('option name SyzygyPath type string default <empty>')
+            self.send('option name CacheFile type string default <empty>')
+            self.send('uciok')
+        elif command == 'isready':
+            # GUIs wait for readyok before starting the clock, so the search pool
+            # is started here rather than on the first go.
+            self.get_engine().start_workers()
+            self.send('readyok')
+        elif command == 'setoption':
+            self.stop_search()
+            self.set_option(args)
+        elif command == 'ucinewgame':
+            self.stop_search()
+            if self.engine is not None:
+                self.engine.new_game()
+            self.board = chess.Board()
+        elif command == 'position':
+            self.stop_search()
+            self.set_position(args)
+        elif command == 'go':
+            self.stop_search()
+            self.go(args)
+        elif command == 'stop':
+            self.stop_search()
+        return True
+
+    def set_option(self, args):
+        # setoption name <name> [value <value>]; names and values may contain spaces.
+        if 'name' not in args:
+            return
+        name_end = args.index('value') if 'value' in args else len(args)
+        name = ' '.join(args[args.index('name') + 1:name_end])
+        value = ' '.join(args[name_end + 1:])
+        if name in ('Hash', 'Threads'):
+            try:
+                number = int(value)
+            except ValueError:
+                self.send(f'info string invalid value {value} for option {name}')
+                return
+        if name == 'Hash':
+            self.options['Hash'] = min(max(number, 1), MAX_HASH_MB)
+        elif name == 'Threads':
+            self.options['Threads'] = min(max(number, 1), MAX_THREADS)
+        elif name in ('BookFile', 'SyzygyPath', 'CacheFile'):
+            self.options[name] = '' if value == '<empty>' else value
+        else:
+            self.send(f'info string unknown option {name}')
+            return
+        self.apply_option(name)
+
+    def apply_option(self, name):
+        # Only Threads needs a new engine and pool; the rest is changed in place,
+        # so the pool processes and their tables survive.
+        if self.engine is None:
+            return
+        if name == 'Threads':
+            self.close_engine()
+        elif name == 'Hash':
+            self.engine.resize_table(self.table_size())
+        else:
+            setter = {'BookFile': self.engine.set_book, 'SyzygyPath': self.engine.set_tablebase,
+                      'CacheFile': self.engine.set_cache}[name]
+            try:
+                setter(self.options[name] or None)
+            except OSError as error:
+                self.options[name] = ''
+                self.send(f'info string cannot open {name}: {error}')
+
+    def set_position(self, args):
+        # An invalid FEN or move leaves the previous position in place.
+        if not args:
+            return
+        moves_at = args.index('moves') if 'moves' in args else len(args)
+        if args[0] == 'startpos':
+            board = chess.Board()
+        elif args[0] == 'fen':
+            fen = ' '.join(args[1:moves_at])
+            try:
+                board = chess.Board(fen)
+            except ValueError:
+                self.send(f'info string invalid fen {fen}')
+                return
+        else:
+            return
+        for uci in args[moves_at + 1:]:
+            try:
+                board.push_uci(uci)
+            except ValueError:
+                self.send(f'info string illegal move {uci} in {board.fen()}')
+                return
+        self.board = board
+
+    def go(self, args):
+        limits = {}
+        index = 0
+        while index < len(args):
+            if args[index] in ('depth', 'movetime', 'wtime', 'btime', 'winc', 'binc', 'movestogo', 'nodes'):
+                # A missing or malformed value drops that limit only.
+                try:
+                    limits[args[index]] = int(args[index + 1])
+                except (IndexError, ValueError):
+                    self.send(f'info string invalid value for {args[index]}')
+                index += 2
+            else:
+                # Without limits the search runs until stop; infinite also holds
+                # bestmove back until then.
+                index += 1
+
+        engine = self.get_engine()
+        movetime_ms = limits.get('movetime')
+        if movetime_ms is None:
+            movetime_ms = self.allocate_time(limits)
+        if 'depth' in limits and movetime_ms is None and 'nodes' not in limits:
+            engine.max_depth = max(limits['depth'] - 1, 0)
+        else:
+            engine.max_depth = ChessEngine.MAX_DEPTH - 1
+        self.stop_requested.clear()
+        self.search_thread = threading.Thread(target=self.search, args=(self.board.copy(), movetime_ms,
+                                                                      limits.get('nodes'),
+                                                                      engine.request_search(),
+                                                                      'infinite' in args), daemon=True)
+        self.search_thread.start()
+
+    def allocate_time(self, limits):
+        time_left = limits.get('wtime' if self.board.turn == chess.WHITE else 'btime')
+        if time_left is None:
+            return None
+        increment = limits.get('winc' if self.board.turn == chess.WHITE else 'binc', 0)
+        moves_to_go = limits.get('movestogo', DEFAULT_MOVES_TO_GO)
+        budget = time_left // max(moves_to_go, 1) + increment * 3 // 4
+        return max(min(budget, time_left - MOVE_OVERHEAD_MS), 1)
+
+    def search(self, board, movetime_ms, nodes, search_id, infinite=False):
+        start = time.monotonic()
+        result = self.engine.search(board, movetime_ms, nodes, info=self.send_info, search_id=search_id)
+        if infinite:
+            # The book, the tablebase or the depth limit can answer before stop.
+            self.stop_requested.wait()
+        move = result.move
+        if move is None:
+            self.send('bestmove 0000')
+            return
+        self.send(f'info depth {result.depth} nodes {result.nodes} time {int((time.monotonic() - start) * 1000)}')
+        self.send(f'bestmove {move.uci()}')
+
+    def send_info(self, data):
+        score = data['score']
+        if abs(score) >= ChessEngine.MATE_SCORE - ChessEngine.MAX_DEPTH:
+            # Mate scores are MATE_SCORE less the plies to mate.
+            moves = (ChessEngine.MATE_SCORE - abs(score) + 1) // 2
+            score_text = f'mate {moves if score > 0 else -moves}'
+        else:
+            score_text = f'cp {score}'
+        elapsed = data['time']
+        nps = int(data['nodes'] / elapsed) if elapsed > 0 else 0
+        pv = ' '.join(move.uci() for move in data['pv'])
+        extra = ''
+        if 'seldepth' in data:
+            extra = f" seldepth {data['seldepth']} hashfull {data['hashfull']}"
+        self.send(f"info depth {data['depth']}{extra} score {score_text} nodes {data['nodes']} nps {nps} "
+                  f"time {int(elapsed * 1000)} pv {pv}")
+
+    def stop_search(self):
+        if self.search_thread is not None:
+            self.engine.stop()
+            self.stop_requested.set()
+            self.search_thread.join()
+        self.search_thread = None
+
+def main():
+    UciEngine().run(sys.stdin)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,277 @@
+# Qt chess boards shared by the GUI front-ends: ChessBoard for two humans on one
+# board, and EngineChessBoard, where the engine plays Black on a worker thread.
+import os
+from PyQt5.QtWidgets import QWidget, QGridLayout, QPushButton, QShortcut
+from PyQt5.QtGui import QIcon, QKeySequence
+from PyQt5.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+import chess
+from chess import Move
+from .engine import ChessEngine
+from .piece_icons import piece_icon
+
+class ChessBoard(QWidget):
+    # icons draws the piece images, otherwise the piece letters. colors are the
+    # light and dark square colours; None leaves the default button style.
+    def __init__(self, square_size=(100, 80), icons=True, colors=('white', 'gray'),
+                 geometry=(50, 30, 400, 400)):
+        super().__init__()
+
+        self.board = chess.Board()
+        self.selected_square = None
+        self.square_size = square_size
+        self.icons = icons
+        self.colors = colors
+        self.initUI(geometry)
+
+    def initUI(self, geometry):
+        gridLayout = QGridLayout()
+
+        # buttons[row][col], row 0 being the eighth rank.
+        self.buttons = [[None] * 8 for _ in range(8)]
+        self.drawn_pieces = [None] * 64
+        self.moves_from = None
+        self.highlighted = set()
+        for row in range(8):
+            for col in range(8):
+                square = chess.square(col, 7 - row)
+                button = QPushButton()
+                button.setFixedSize(*self.square_size)
+                button.clicked.connect(lambda _, sq=square: self.handle_square_click(sq))
+                button.setObjectName(f'button_{row}_{col}')
+                self.buttons[row][col] = button
+                self.set_square_style(square, False)
+                gridLayout.addWidget(button, row, col)
+
+        self.update_board()
+        self.setLayout(gridLayout)
+        self.setWindowTitle('Chess Board')
+        self.setGeometry(*geometry)
+
+    def handle_square_click(self, square):
+        print(f"Selected Square: {square}")
+
+        moves_from = self.legal_move_index()
+        if self.selected_square is None:
+            if square in moves_from:
+                self.selected_square = square
+                self.highlight_legal_moves()
+        else:
+            move = moves_from[self.selected_square].get(square)
+            print(f"Attempted Move: {move or Move(self.selected_square, square)}")
+            if move is not None:
+                self.play_move(move)
+            elif square in moves_from:
+                self.selected_square = square
+                self.highlight_legal_moves()
+
+    def play_move(self, move):
+        self.board.push(move)
+        self.update_board()
+        self.selected_square = None
+        self.highlight_legal_moves()
+
+    def highlight_legal_moves(self):
+        # With a piece selected its destinations light up, otherwise every piece
+        # that can move. Only squares whose highlight changes are restyled.
+        moves_from = self.legal_move_index()
+        if self.selected_square is None:
+            squares = set(moves_from)
+        else:
+            squares = set(moves_from.get(self.selected_square, ()))
+        for square in self.highlighted - squares:
+            self.set_square_style(square, False)
+        for square in squares - self.highlighted:
+            self.set_square_style(square, True)
+        self.highlighted = squares
+
+    def set_square_style(self, square, highlighted):
+        row, col = 7 - chess.square_rank(square), chess.square_file(square)
+        color = 'lightgreen' if highlighted else self.colors[(row + col) % 2]
+        self.buttons[row][col].setStyleSheet(f"background-color: {color};" if color else "")
+
+    def legal_move_index(self):
+        # moves_from[from_square][to_square] is the legal move, built once per
+        # position. Promotions are entered by their squares and become queens.
+        if self.moves_from is None:
+            self.moves_from = {}
+            for move in self.board.legal_moves:
+                if move.promotion in (None, chess.QUEEN):
+                    self.moves_from.setdefault(move.from_square, {})[move.to_square] = move
+        return self.moves_from
+
+    def update_board(self):
+        self.moves_from = None
+        # Only squares whose piece differs from what is drawn are redrawn.
+        for square in chess.SQUARES:
+            piece = self.board.piece_at(square)
+            if piece != self.drawn_pieces[square]:
+                self.set_piece(self.buttons[7 - chess.square_rank(square)][chess.square_file(square)], piece)
+                self.drawn_pieces[square] = piece
+
+    def set_piece(self, button, piece):
+        if not self.icons:
+            button.setText(str(piece) if piece else '')
+            return
+        icon = piece_icon(piece) if piece else None
+        if icon is None:
+            button.setIcon(QIcon())
+        else:
+            button.setIcon(icon[0])
+            button.setIconSize(icon[1])
+
+class EngineWorker(QObject):
+    # Runs ChessEngine searches on a QThread so the GUI thread keeps painting.
+    # Every search carries its id from engine.request_search(); the board ignores
+    # results from stale ids.
+    info = pyqtSignal(int, dict)
+    bestMove = pyqtSignal(int, object)
+    ponderFinished = pyqtSignal(int, object)
+
+    def __init__(self, engine):
+        super().__init__()
+        self.engine = engine
+
+    @pyqtSlot(int, object, int)
+    def search(self, search_id, board, movetime_ms):
+        result = self.engine.search(board, movetime_ms=movetime_ms,
+                                    info=lambda data: self.info.emit(search_id, data), search_id=search_id)
+        self.bestMove.emit(search_id, result.move)
+
+    @pyqtSlot(int, object)
+    def ponder(self, search_id, board):
+        # Runs until the board stops it or turns it into the real search. Its
+        # result is only a move once the human has played the expected reply.
+        result = self.engine.search(board, info=lambda data: self.info.emit(search_id, data), ponder=True,
+                                    search_id=search_id)
+        self.ponderFinished.emit(search_id, result.move)
+
+class EngineChessBoard(ChessBoard):
+    # The human plays White; the engine answers as Black and ponders on the
+    # human's time.
+    searchRequested = pyqtSignal(int, object, int)
+    ponderRequested = pyqtSignal(int, object)
+
+    ENGINE_MOVETIME_MS = 2000
+
+    def __init__(self, engine=None, **kwargs):
+        if engine is None:
+            engine = ChessEngine(max_depth=3,  # Adjust depth as needed
+                                 book_path=os.environ.get('CHESS_BOOK'),
+                                 tablebase_path=os.environ.get('SYZYGY_PATH'))
+        self.engine = engine
+        self.search_id = None
+        self.searching = False
+        self.pondering = False
+        self.ponder_move = None
+        self.ponder_result = None
+        self.engine_pv = []
+        super().__init__(**kwargs)
+
+    def initUI(self, geometry):
+        super().initUI(geometry)
+
+        self.engine_thread = QThread(self)
+        self.engine_worker = EngineWorker(self.engine)
+        self.engine_worker.moveToThread(self.engine_thread)
+        self.searchRequested.connect(self.engine_worker.search)
+        self.ponderRequested.connect(self.engine_worker.ponder)
+        self.engine_worker.info.connect(self.show_engine_info)
+        self.engine_worker.bestMove.connect(self.make_engine_move)
+        self.engine_worker.ponderFinished.connect(self.finish_ponder)
+        self.engine_thread.start()
+
+        QShortcut(QKeySequence.New, self, activated=self.reset_game)
+
+    def start_engine_search(self):
+        if self.board.turn != chess.BLACK or self.board.is_game_over():
+            return
+        self.search_id = self.engine.request_search()
+        self.searching = True
+        self.searchRequested.emit(self.search_id, self.board.copy(), self.ENGINE_MOVETIME_MS)
+
+    def start_ponder(self):
+        # While the human thinks, search the position after the reply the engine
+        # expects, or the human's own position if it expects none; either way the
+        # transposition table is warm when the real search starts.
+        if self.board.turn != chess.WHITE or self.board.is_game_over():
+            return
+        board = self.board.copy()
+        self.ponder_move = None
+        self.ponder_result = None
+        if len(self.engine_pv) > 1 and self.engine_pv[1] in board.legal_moves:
+            self.ponder_move = self.engine_pv[1]
+            board.push(self.ponder_move)
+        self.search_id = self.engine.request_search()
+        self.searching = True
+        self.pondering = True
+        self.ponderRequested.emit(self.search_id, board)
+
+    def cancel_engine_search(self):
+        # Dropping the id ignores whatever the stopped search still reports. The
+        # stop also applies to a search queued on the worker thread but not started.
+        self.search_id = None
+        self.pondering = False
+        if self.searching:
+            self.engine.stop()
+            self.searching = False
+
+    def show_engine_info(self, search_id, data):
+        if search_id != self.search_id:
+            return
+        self.engine_pv = data['pv']
+        pv = ' '.join(move.uci() for move in data['pv'])
+        self.setWindowTitle(f"Chess Board - depth {data['depth']} score {data['score']} pv {pv}")
+
+    def make_engine_move(self, search_id, move):
+        if search_id != self.search_id:
+            return
+        self.searching = False
+        if move is not None and move in self.board.legal_moves:
+            self.board.push(move)
+            self.update_board()
+            self.highlight_legal_moves()
+            print(f"Engine's move: {move}")
+            self.start_ponder()
+
+    def finish_ponder(self, search_id, move):
+        # A ponder search that ends before the human moves (a book or tablebase
+        # answer, or the full depth reached) is kept until the human's move
+        # shows whether it applies. After a ponder hit it is the engine's move.
+        if search_id != self.search_id:
+            return
+        if self.pondering:
+            self.searching = False
+            self.ponder_result = move
+        else:
+            self.make_engine_move(search_id, move)
+
+    def play_move(self, move):
+        # On a ponder hit the running search simply becomes the real one.
+        ponder_hit = self.pondering and move == self.ponder_move
+        if not ponder_hit:
+            self.cancel_engine_search()
+        super().play_move(move)
+        if not ponder_hit:
+            self.start_engine_search()
+            return
+        self.pondering = False
+        if self.searching:
+            self.engine.ponderhit(self.ENGINE_MOVETIME_MS)
+        elif self.ponder_result is not None:
+            self.make_engine_move(self.search_id, self.ponder_result)
+        else:
+            self.start_engine_search()
+
+    def reset_game(self):
+        self.cancel_engine_search()
+        self.board.reset()
+        self.selected_square = None
+        self.setWindowTitle('Chess Board')
+        self.update_board()
+        self.highlight_legal_moves()
+
+    def closeEvent(self, event):
+        self.cancel_engine_search()
+        self.engine_thread.quit()
+        self.engine_thread.wait()
+        super().closeEvent(event)
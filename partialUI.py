@@ -1,30 +1,13 @@
-from PyQt5.QtWidgets import QApplication, QWidget, QGridLayout, QPushButton, QInputDialog
+# Board drawn with piece letters: White's moves are typed into a dialog and Black
+# plays its first legal move.
+from PyQt5.QtWidgets import QApplication, QInputDialog
 import chess
 from chess import Move
+from chessgame.ui import ChessBoard
 
-class ChessBoard(QWidget):
+class PartialChessBoard(ChessBoard):
     def __init__(self):
-        super().__init__()
-
-        self.board = chess.Board()
-        self.initUI()
-
-    def initUI(self):
-        gridLayout = QGridLayout()
-
-        for row in range(8):
-            for col in range(8):
-                square = chess.square(col, 7 - row)
-                piece = self.board.piece_at(square)
-                label = str(piece) if piece else ''
-                button = QPushButton(label)
-                button.setFixedSize(50, 50)
-                button.clicked.connect(lambda _, sq=square: self.handle_square_click(sq))
-                gridLayout.addWidget(button, row, col)
-
-        self.setLayout(gridLayout)
-        self.setWindowTitle('Chess Board')
-        self.setGeometry(100, 100, 400, 400)
+        super().__init__(square_size=(50, 50), icons=False, colors=(None, None), geometry=(100, 100, 400, 400))
 
     def handle_square_click(self, square):
         if self.board.turn == chess.WHITE:
@@ -45,18 +28,8 @@ class ChessBoard(QWidget):
         legal_moves = list(self.board.legal_moves)
         return legal_moves[0] if legal_moves else None
 
-    def update_board(self):
-        for i in range(self.layout().count()):
-            widget = self.layout().itemAt(i).widget()
-            if isinstance(widget, QPushButton):
-                row, col, _, _ = self.layout().getItemPosition(i)
-                square = chess.square(col, 7 - row)
-                piece = self.board.piece_at(square)
-                label = str(piece) if piece else ''
-                widget.setText(label)
-
 if __name__ == '__main__':
     app = QApplication([])
-    chessBoard = ChessBoard()
+    chessBoard = PartialChessBoard()
     chessBoard.show()
     app.exec_()